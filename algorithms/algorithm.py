@@ -2,8 +2,10 @@ from __future__ import print_function, division
 __author__ = 'panzer'
 import sys, os
 sys.path.append(os.path.abspath("."))
-from utils.lib import O
+from utils.lib import O, get_time
 from utils.stat import Stat
+from utils.checkpoint import Checkpoint
+from configs import CHECKPOINT_EVERY
 
 class Algorithm(O):
   def __init__(self, name, problem):
@@ -23,6 +25,7 @@ class Algorithm(O):
     self._reference = None
     self.is_pareto = True
     self.gen = 0
+    self._checkpoint = None
 
   @staticmethod
   def solution_range(obtained):
@@ -39,5 +42,34 @@ class Algorithm(O):
             "   Max = ", max(solutions[i]),
             "   Min = ", min(solutions[i]))
 
+  def load_checkpoint(self):
+    """
+    Set up checkpoints if the "checkpoint" setting
+    is a file name and restore the last checkpoint
+    if the "resume" setting is True.
+    :return: O with the state given to save_checkpoint or None
+    """
+    file_name = self.settings["checkpoint"]
+    if not file_name:
+      return None
+    every = self.settings["checkpoint_every"]
+    self._checkpoint = Checkpoint(file_name, CHECKPOINT_EVERY if every is None else every)
+    if not self.settings["resume"]:
+      return None
+    return self._checkpoint.load(self)
+
+  def save_checkpoint(self, start, **state):
+    """
+    Save a checkpoint at the end of a generation when due
+    :param start: Start time of the run
+    :param state: Local state of the run loop
+    """
+    if self._checkpoint and self._checkpoint.due(self.gen) and self.gen < self.settings.gens:
+      self._checkpoint.save(self, runtime=get_time() - start, **state)
+
+  def finish_checkpoint(self):
+    if self._checkpoint:
+      self._checkpoint.remove()
+
   def run(self):
     assert False
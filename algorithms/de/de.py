@@ -33,16 +33,23 @@ class DE(Algorithm):
 
   def run(self):
     start = get_time()
-    if not self.population:
-      self.population = self.problem.populate(self.settings.pop_size)
-    population = [Point(one) for one in self.population]
-    self.stat.update(population)
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+      population = state.population
+    else:
+      if not self.population:
+        self.population = self.problem.populate(self.settings.pop_size)
+      population = [Point(one) for one in self.population]
+      self.stat.update(population)
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
       selected = self.select(population)
       population = self.evolve(selected, population)
       self.stat.update(population)
+      self.save_checkpoint(start, population=population)
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return population
 
@@ -34,10 +34,15 @@ class GALE(Algorithm):
 
   def run(self):
     start = get_time()
-    if not self.population:
-      self.population = self.problem.populate(self.settings.pop_size)
-    population = Node.format(self.population)
-    best_solutions = []
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+      population, best_solutions = state.population, state.best_solutions
+    else:
+      if not self.population:
+        self.population = self.problem.populate(self.settings.pop_size)
+      population = Node.format(self.population)
+      best_solutions = []
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
@@ -51,6 +56,8 @@ class GALE(Algorithm):
       selectees = self.evolve(selectees)
 
       population = self.recombine(selectees, self.settings.pop_size)
+      self.save_checkpoint(start, population=population, best_solutions=best_solutions)
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return best_solutions
 
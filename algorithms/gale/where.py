@@ -55,6 +55,7 @@ class NodePoint(Point):
     """
     other = NodePoint(self.decisions)
     other.objectives = self.objectives
+    other.constraint_status = self.constraint_status
     other.evaluated = self.evaluated
     other.a, other.b = self.a, self.b
     other.c, other.x = self.c, self.x
@@ -63,6 +64,7 @@ class NodePoint(Point):
   def clear(self):
     self.decisions = None
     self.objectives = None
+    self.constraint_status = None
     self.evaluated = False
     self.a = None              # Distance from East
     self.b = None              # Distance from West
@@ -1,6 +1,7 @@
 from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
+import numpy as np
 
 __author__ = 'panzer'
 
@@ -13,73 +14,65 @@ def get_distance(distance_name):
 
 """
 Distance Measures
+Each measure scores objective vectors against
+weight vectors row by row, so that one mutant is
+compared with all the weights of a neighborhood in
+a single call. Rows broadcast: a single objective
+vector can be scored against many weights.
 """
-def pbi(moead, objectives, weights):
+def pbi(moead, objectives, weights, norms=None):
   """
   Penalty Boundary Intersection distance
   :param moead - Instance of MOEAD.
-  :param objectives - Objectives of the point.
-  :param weights - Weight of the points.
+  :param objectives - (k x m) objectives of the points, or (1 x m).
+  :param weights - (k x m) weights of the subproblems.
+  :param norms - Vector(k) of the norms of the weights. Computed if None.
+  :return: Vector(k) of distances
   """
-  d1_vector = [abs(i-f) for i, f in zip(objectives, moead.ideal)]
-  weights_norm = vector_norm(weights)
-  d1 = dot_product(d1_vector, weights)/weights_norm
-  d2_vector = []
-  for i, obj in enumerate(moead.problem.objectives):
-    if obj.to_minimize:
-      d2_vector.append(objectives[i] - (moead.ideal[i]+d1*weights[i]))
-    else:
-      d2_vector.append(objectives[i] - (moead.ideal[i]-d1*weights[i]))
-  d2 = vector_norm(d2_vector)
+  objectives = np.atleast_2d(objectives)
+  weights = np.atleast_2d(weights)
+  if norms is None:
+    norms = np.sqrt((weights ** 2).sum(axis=1))
+  ideal = np.asarray(moead.ideal, dtype=float)
+  d1 = (np.abs(objectives - ideal) * weights).sum(axis=1) / norms
+  # Maximized objectives move away from the ideal point downwards
+  d2_vectors = objectives - (ideal + moead.directions * d1[:, None] * weights)
+  d2 = np.sqrt((d2_vectors ** 2).sum(axis=1))
   return d1 + moead.settings.penalty * d2
 
 
-def weighted_tch(moead, objectives, weights):
+def weighted_tch(moead, objectives, weights, norms=None):
   """
   Tchebyshev distance
   :param moead - Instance of MOEAD.
-  :param objectives - Objectives of the point.
-  :param weights - Weight of the points.
+  :param objectives - (k x m) objectives of the points, or (1 x m).
+  :param weights - (k x m) weights of the subproblems.
+  :param norms - Unused, for the signature of the distance measures.
+  :return: Vector(k) of distances
   """
-  mins = [sys.maxint] * len(moead.problem.objectives)
-  maxs = [-sys.maxint] * len(moead.problem.objectives)
-  for i in xrange(len(moead.problem.objectives)):
-    for j in xrange(len(moead.problem.objectives)):
-      val = moead.best_boundary_objectives[j][j]
-      if val > maxs[i]: maxs[i] = val
-      if val < mins[i]: mins[i] = val
-    if maxs[i] == mins[i]:
-      #print("min value and max value are the same")
-      return sys.maxint
-  dist = -sys.maxint
-  for i in xrange(len(moead.problem.objectives)):
-    normalized = abs((objectives[i]-moead.ideal[i])/(maxs[i]-mins[i]))
-    if weights[i] == 0:
-      normalized *= 0.0001
-    else:
-      normalized *= weights[i]
-    dist = max(dist, normalized)
-  assert dist >= 0, "Distance can't be less than 0"
+  objectives = np.atleast_2d(objectives)
+  weights = np.atleast_2d(weights)
+  spread = tch_spread(moead)
+  if spread == 0:
+    return np.full(max(len(objectives), len(weights)), sys.maxint, dtype=float)
+  ideal = np.asarray(moead.ideal, dtype=float)
+  normalized = np.abs((objectives - ideal) / spread) * np.where(weights == 0, 0.0001, weights)
+  dist = normalized.max(axis=1)
+  assert (dist >= 0).all(), "Distance can't be less than 0"
   return dist
 
 
 """
 Utility Methods
 """
-def vector_norm(vector):
+def tch_spread(moead):
   """
-  Get the  norm of the vector
-  :param vector: Vector to be normalized
-  :return:
-  """
-  return sum([v**2 for v in vector])**0.5
-
-def dot_product(one, two):
-  """
-  Dot Product between one and two
-  :param one: Vector one
-  :param two: Vector two
-  :return:
+  Range of the objectives of the boundary points
+  used to normalize the Tchebyshev distance. Cached
+  on the MOEAD instance until the ideal point moves.
+  :param moead - Instance of MOEAD.
   """
-  assert len(one) == len(two), "Vectors are not of equal length"
-  return sum([o_i*t_i for o_i, t_i in zip(one, two)])
\ No newline at end of file
+  if moead._tch_spread is None:
+    diagonal = [moead.best_boundary_objectives[j][j] for j in xrange(len(moead.problem.objectives))]
+    moead._tch_spread = max(diagonal) - min(diagonal)
+  return moead._tch_spread
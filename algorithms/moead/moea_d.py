@@ -2,11 +2,12 @@ from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
 from utils.lib import *
+import numpy as np
 from algorithms.algorithm import Algorithm
 import utils.tools as tools
 from configs import moead_settings as default_settings
 from algorithms.nsga3.reference import cover, DIVISIONS
-from utils.distances import eucledian
+from utils.distances import nearest_neighbors
 from decompositions import get_distance
 from reproduction import get_crossover
 
@@ -32,9 +33,10 @@ class MOEADPoint(Point):
     """
     new  = MOEADPoint(self.decisions)
     if self.objectives: new.objectives = self.objectives[:]
+    new.constraint_status = self.constraint_status
     if self.wt_indices: new.wt_indices = self.wt_indices[:]
     if self.weight: new.weight = self.weight[:]
-    if self.neighbor_ids: new.neighbor_ids = self.neighbor_ids[:]
+    if self.neighbor_ids is not None: new.neighbor_ids = self.neighbor_ids.copy()
     return new
 
 
@@ -51,27 +53,47 @@ class MOEA_D(Algorithm):
     self.distance = get_distance(self.settings.distance)
     self.crossover = get_crossover(self.settings.crossover)
     self.neighborhood = "local"
+    self.directions = np.array(self.problem.directional_weights(), dtype=float)
+    self._tch_spread = None
+    # Subproblems as rows ordered on the point ids
+    self.keys = None
+    self.rows = None
+    self.weights = None
+    self.weight_norms = None
+    self.incumbents = None
+    self.values = None
+    self._stale = None
+    self.neighbor_rows = None
+    self.neighbors = None
 
 
   def setup(self, population):
     """
     Mark each point with the nearest "T"
     weight vectors and return the global best.
+    The ids of the neighbors of all the points
+    are kept as an (N x T) array in "neighbors",
+    ordered on the point ids like the weights
+    and the objectives of the incumbents. The
+    distances of the incumbents to their weights
+    are kept in "values" and computed when first
+    needed after the ideal point moves.
     """
     self.init_weights(population)
-    for key in population.keys():
+    for key in sorted(population.keys()):
       population[key].evaluate(self.problem, self.stat, 1)
-    for one in population.keys():
-      distances = []
-      ids = []
-      for two in population.keys():
-        if one == two:
-          continue
-        ids.append(two)
-        distances.append(eucledian(population[one].weight, population[two].weight))
-      sorted_ids = [index for dist, index in sorted(zip(distances, ids))]
-      population[one].neighbor_ids = sorted_ids[:self.settings.T]
-    for key in population.keys():
+    self.keys = np.array(sorted(population.keys()))
+    self.rows = dict((key, row) for row, key in enumerate(self.keys.tolist()))
+    self.weights = np.array([population[key].weight for key in self.keys.tolist()], dtype=float)
+    self.weight_norms = np.sqrt((self.weights ** 2).sum(axis=1))
+    self.incumbents = np.array([population[key].objectives for key in self.keys.tolist()], dtype=float)
+    self.values = np.empty(len(self.keys))
+    self._stale = np.ones(len(self.keys), dtype=bool)
+    self.neighbor_rows = nearest_neighbors(self.weights, self.settings.T)
+    self.neighbors = self.keys[self.neighbor_rows]
+    for key, neighbor_ids in zip(self.keys.tolist(), self.neighbors):
+      population[key].neighbor_ids = neighbor_ids
+    for key in sorted(population.keys()):
       self.update_ideal(population[key])
 
 
@@ -95,12 +117,13 @@ class MOEA_D(Algorithm):
     divs = DIVISIONS.get(m, None)
     weights = None
     if divs:
-      weights = cover(m, divs[0], divs[1])
+      # Copy the shared reference points before shuffling
+      weights = cover(m, divs[0], divs[1]).tolist()
     if weights is None or len(weights) != len(population):
       weights = random_weights()
     assert len(weights) == len(population), "Number of weights != Number of points"
     weights = shuffle(weights)
-    for i, key in enumerate(population.keys()):
+    for i, key in enumerate(sorted(population.keys())):
       population[key].weight = weights[i]
 
   def reproduce(self, point, population):
@@ -113,48 +136,109 @@ class MOEA_D(Algorithm):
     #from measures.igd import igd
     start = get_time()
     #ideal_pf = self.problem.get_pareto_front()
-    if self.population is None:
-      self.population = self.problem.populate(self.settings.pop_size)
-    population = {}
-    for one in self.population:
-      pt = MOEADPoint(one)
-      population[pt.id] = pt
-    self.setup(population)
-    self.stat.update(population.values())
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+      population = state.population
+    else:
+      if self.population is None:
+        self.population = self.problem.populate(self.settings.pop_size)
+      population = {}
+      for one in self.population:
+        pt = MOEADPoint(one)
+        population[pt.id] = pt
+      self.setup(population)
+      self.stat.update([population[key] for key in sorted(population.keys())])
+    pool = None
+    if self.settings.synchronous and self.settings.workers != 1:
+      pool = evaluation_pool(self.problem, self.settings.workers)
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
-      for point_id in shuffle(population.keys()):
-        mutant = self.reproduce(population[point_id], population)
-        mutant.evaluate(self.problem, self.stat, self.gen)
-        self.update_ideal(mutant)
-        self.update_neighbors(population[point_id], mutant, population)
+      if self.settings.synchronous:
+        self.synchronous_generation(population, pool)
+      else:
+        for point_id in shuffle(sorted(population.keys())):
+          mutant = self.reproduce(population[point_id], population)
+          mutant.evaluate(self.problem, self.stat, self.gen)
+          self.update_ideal(mutant)
+          self.update_neighbors(population[point_id], mutant, population)
       #objs = [population[pt_id].objectives for pt_id in population.keys()]
-      self.stat.update(population.values())
+      self.stat.update([population[key] for key in sorted(population.keys())])
+      self.save_checkpoint(start, population=population)
+    if pool is not None:
+      pool.close()
+      pool.join()
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return population
 
 
+  def synchronous_generation(self, population, pool=None):
+    """
+    One generation where every point first produces a
+    mutant from the population at the start of the
+    generation. The mutants are evaluated in one batch
+    and then update the ideal point and replace their
+    neighbors in the shuffled order they were produced
+    in, irrespective of the number of workers.
+    :param population: Dictionary of id to MOEADPoint
+    :param pool: Pool from evaluation_pool to evaluate the mutants on
+    """
+    offspring = []
+    for point_id in shuffle(sorted(population.keys())):
+      mutant = self.reproduce(population[point_id], population)
+      # DE picks the neighborhood of each mutant
+      offspring.append((point_id, mutant, self.neighborhood))
+    evaluate_points([mutant for _, mutant, _ in offspring], self.problem, self.stat, self.gen, pool)
+    for point_id, mutant, neighborhood in offspring:
+      self.neighborhood = neighborhood
+      self.update_ideal(mutant)
+      self.update_neighbors(population[point_id], mutant, population)
+
   def update_ideal(self, point):
+    moved = False
     for i, obj in enumerate(self.problem.objectives):
       if obj.to_minimize:
         if point.objectives[i] < self.ideal[i]:
           self.ideal[i] = point.objectives[i]
           self.best_boundary_objectives[i] = point.objectives[:]
+          moved = True
       else:
         if point.objectives[i] > self.ideal[i]:
           self.ideal[i] = point.objectives[i]
           self.best_boundary_objectives[i] = point.objectives[:]
+          moved = True
+    if moved:
+      # Distances depend on the ideal point
+      self._tch_spread = None
+      if self._stale is not None:
+        self._stale[:] = True
 
   def update_neighbors(self, point, mutant, population):
-    ids = point.neighbor_ids if self.neighborhood == "local" else population.keys()
-    for neighbor_id in ids:
-      neighbor = population[neighbor_id]
-      neighbor_distance = self.distance(self, neighbor.objectives, neighbor.weight)
-      mutant_distance = self.distance(self, mutant.objectives, neighbor.weight)
-      if mutant_distance < neighbor_distance:
-        population[neighbor_id].decisions = mutant.decisions
-        population[neighbor_id].objectives = mutant.objectives
+    """
+    Replace the neighbors of "point" whose subproblem
+    the mutant solves better. The mutant is scored
+    against all the neighbor weights at once and
+    compared with the kept incumbent distances.
+    """
+    if self.neighborhood == "local":
+      rows = self.neighbor_rows[self.rows[point.id]]
+    else:
+      rows = np.arange(len(self.keys))
+    stale = rows[self._stale[rows]]
+    if len(stale):
+      self.values[stale] = self.distance(self, self.incumbents[stale], self.weights[stale], self.weight_norms[stale])
+      self._stale[stale] = False
+    mutant_distances = self.distance(self, mutant.objectives, self.weights[rows], self.weight_norms[rows])
+    better = mutant_distances < self.values[rows]
+    for row, distance in zip(rows[better].tolist(), mutant_distances[better].tolist()):
+      neighbor = population[self.keys[row]]
+      neighbor.decisions = mutant.decisions
+      neighbor.objectives = mutant.objectives
+      neighbor.constraint_status = mutant.constraint_status
+      self.incumbents[row] = mutant.objectives
+      self.values[row] = distance
 
   def get_nadir_point(self, population):
     nadir = [-sys.maxint if obj.to_minimize else sys.maxint for obj in self.problem.objectives]
@@ -10,6 +10,7 @@ class MOEA_DE(MOEA_D):
   Implements DE version of MOEAD with Tchebychev distance
   """
   def __init__(self, problem, population=None, **settings):
+    # Set before MOEA_D picks the distance and crossover functions
+    settings.update(distance="tch", crossover="de")
     MOEA_D.__init__(self, problem, population=population, **settings)
-    self.settings.update(distance="tch", crossover="de")
     self.name = "MOEA_DE"
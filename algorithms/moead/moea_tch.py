@@ -10,6 +10,7 @@ class MOEA_TCH(MOEA_D):
   Implements TCH version of MOEAD
   """
   def __init__(self, problem, population=None, **settings):
+    # Set before MOEA_D picks the distance and crossover functions
+    settings.update(distance="tch", crossover="sbx")
     MOEA_D.__init__(self, problem, population=population, **settings)
-    self.settings.update(distance="tch", crossover="sbx")
     self.name = "MOEA_TCH"
@@ -86,7 +86,7 @@ def select_mates(point, population, is_local):
       one = rand_one(ids)
       seen.append(one)
     return one
-  neighbor_ids = point.neighbor_ids if is_local else population.keys()
+  neighbor_ids = point.neighbor_ids if is_local else sorted(population.keys())
   mom = one_more(neighbor_ids)
   dad = one_more(neighbor_ids)
   return mom, dad
@@ -6,6 +6,9 @@ sys.path.append(os.path.abspath("."))
 from utils.lib import *
 from algorithms.algorithm import Algorithm
 import utils.tools as tools
+from utils.sorting import sort_points, point_matrix
+from utils.fronts import Fronts
+from utils.distances import crowding_distance
 from configs import nsga2_settings as default_settings
 
 
@@ -19,8 +22,6 @@ class NSGAPoint(Point):
     """
     Point.__init__(self, decisions, problem)
     self.rank = 0
-    self.dominated = []
-    self.dominating = 0
     self.crowd_dist = 0
 
   def clone(self):
@@ -30,6 +31,31 @@ class NSGAPoint(Point):
     """
     new = NSGAPoint(self.decisions)
     new.objectives = self.objectives[:]
+    new.constraint_status = self.constraint_status
+    return new
+
+  def __gt__(self, other):
+    if self.rank != other.rank:
+      return self.crowd_dist > other.crowd_dist
+    else:
+      return self.rank < other.rank
+
+
+class SlotNSGAPoint(SlotPoint):
+  """
+  Compact variant of NSGAPoint
+  """
+  __slots__ = ("rank", "crowd_dist")
+
+  def __init__(self, decisions, problem=None):
+    SlotPoint.__init__(self, decisions, problem)
+    self.rank = 0
+    self.crowd_dist = 0
+
+  def clone(self):
+    new = SlotPoint.clone(self)
+    new.rank = 0
+    new.crowd_dist = 0
     return new
 
   def __gt__(self, other):
@@ -65,6 +91,8 @@ class NSGA2(Algorithm):
     self.evolve = self._evolve
     self.population = population
     self.frontiers = []
+    self.fronts = None
+    self.point = SlotNSGAPoint if self.settings.slots else NSGAPoint
 
 
   def run(self):
@@ -72,17 +100,30 @@ class NSGA2(Algorithm):
     Runner function that runs the NSGA2 optimization algorithm
     """
     start = get_time()
-    if not self.population:
-      self.population = self.problem.populate(self.settings.pop_size)
-    population = [NSGAPoint(one) for one in self.population]
-    pop_size = len(population)
-    self.stat.update(population)
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+      population, pop_size = state.population, state.pop_size
+    else:
+      if not self.population:
+        self.population = self.problem.populate(self.settings.pop_size)
+      population = [self.point(one) for one in self.population]
+      evaluate_points(population, self.problem, self.stat, 1)
+      pop_size = len(population)
+      self.stat.update(population)
+      if self.settings.steady_state:
+        self.fronts = self.build_fronts(population)
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
-      population = self.select(population)
-      population = self.evolve(population, pop_size)
+      if self.settings.steady_state:
+        population = self._steady_state(pop_size)
+      else:
+        population = self.select(population)
+        population = self.evolve(population, pop_size)
       self.stat.update(population)
+      self.save_checkpoint(start, population=population, pop_size=pop_size)
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return population
 
@@ -106,7 +147,7 @@ class NSGA2(Algorithm):
       sis, bro = tools.sbx(self.problem, mom.decisions, dad.decisions)
       sis = tools.poly_mutate(self.problem, sis)
       bro = tools.poly_mutate(self.problem, bro)
-      kids += [NSGAPoint(sis), NSGAPoint(bro)]
+      kids += [self.point(sis), self.point(bro)]
     return clones + kids
 
 
@@ -119,66 +160,85 @@ class NSGA2(Algorithm):
     """
     fronts = self.fast_non_dom_sort(population)
     pop_next = []
-    for i, front in enumerate(fronts):
-      if len(pop_next) + len(fronts[i]) >= size:
-        fronts[i] = self.assign_crowd_dist(front)
-        pop_next += sorted(fronts[i], key=lambda x:x.crowd_dist, reverse=True)[:(size - len(pop_next))]
+    for front in fronts:
+      remaining = size - len(pop_next)
+      if len(front) >= remaining:
+        distances = self.assign_crowd_dist(front)
+        if len(front) > remaining:
+          # Least crowded points, in no particular order
+          front = [front[i] for i in np.argpartition(-distances, remaining - 1)[:remaining]]
+        pop_next += front
         break
       else:
-        pop_next += fronts[i]
+        pop_next += front
     return pop_next
 
+  def build_fronts(self, population):
+    """
+    Incremental fronts of an evaluated population
+    :param population: Population
+    :return: Instance of Fronts
+    """
+    fronts = Fronts(len(self.problem.objectives), self.problem.is_constrained())
+    for one in population:
+      self._insert(fronts, one)
+    return fronts
+
+  def _insert(self, fronts, one):
+    objectives, violations = point_matrix(self.problem, [one])
+    return fronts.insert(one, objectives[0], 0 if violations is None else violations[0])
+
+  def _steady_state(self, size):
+    """
+    (mu + 1) evolution: Each kid is inserted in the fronts
+    and the most crowded point of the last front is removed.
+    A generation creates "size" kids one after the other.
+    :param size: Size of the population
+    :return : The evolved population
+    """
+    for _ in range(size):
+      population = self.fronts.values()
+      mom = tools.binary_tournament_selection(self.problem, population, 4)
+      dad = None
+      while True:
+        dad = tools.binary_tournament_selection(self.problem, population, 4)
+        if not mom == dad: break
+      sis, _ = tools.sbx(self.problem, mom.decisions, dad.decisions)
+      kid = self.point(tools.poly_mutate(self.problem, sis))
+      evaluate_points([kid], self.problem, self.stat, self.gen)
+      self._insert(self.fronts, kid)
+      last = self.fronts.front(len(self.fronts.fronts) - 1)
+      distances = self.assign_crowd_dist([self.fronts[key] for key in last])
+      self.fronts.delete(last[np.argmin(distances)])
+    for rank, front in enumerate(self.fronts.fronts):
+      for key in front:
+        self.fronts[key].rank = rank + 1
+    return self.fronts.values()
+
   def fast_non_dom_sort(self, population):
     """
     Fast Non Dominated Sort
     :param - Population to sort
     :return - List of Frontiers
     """
-    frontiers = []
-    front1 = []
-    for one in population:
-      one.evaluate(self.problem, self.stat, self.gen)
-    for one, rest in loo(population):
-      for two in rest:
-        domination_status = tools.nsga_domination(self.problem, one, two)
-        if domination_status == 1:
-          one.dominated.append(two)
-        elif domination_status == 2:
-          one.dominating += 1
-      if one.dominating == 0:
-        one.rank = 1
-        front1.append(one)
-    current_rank = 1
-    frontiers.append(front1)
-    while True:
-      front2 = []
-      for one in front1:
-        for two in one.dominated:
-          two.dominating -= 1
-          if two.dominating == 0:
-            two.rank =  current_rank + 1
-            front2.append(two)
-      current_rank += 1
-      if len(front2) == 0 :
-        break
-      else :
-        frontiers.append(front2)
-        front1 = front2
+    evaluate_points(population, self.problem, self.stat, self.gen)
+    frontiers = sort_points(self.problem, population, self.settings.sorter)
+    for rank, frontier in enumerate(frontiers):
+      for one in frontier:
+        one.rank = rank + 1
     return frontiers
 
   def assign_crowd_dist(self, frontier):
     """
     Crowding distance between each point in
-    a frontier.
-    """
-    l = len(frontier)
-    for m in range(len(self.problem.objectives)):
-      frontier = sorted(frontier, key=lambda x:x.objectives[m])
-      frontier[0].crowd_dist = float("inf")
-      frontier[-1].crowd_dist = float("inf")
-      for i in range(1,l-1):
-        frontier[i].crowd_dist += (frontier[i+1].objectives[m] - frontier[i-1].objectives[m])
-    return frontier
+    a frontier. Overwrites crowd_dist of the points.
+    :param frontier: List of evaluated points
+    :return: Vector of crowding distances
+    """
+    distances = crowding_distance([one.objectives for one in frontier])
+    for one, dist in zip(frontier, distances.tolist()):
+      one.crowd_dist = dist
+    return distances
 
 
 if __name__ == "__main__":
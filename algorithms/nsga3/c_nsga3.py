@@ -33,7 +33,7 @@ class C_NSGA3(NSGA3):
         if not mom == dad: break
       sis, _ = tools.sbx(self.problem, mom.decisions, dad.decisions)
       sis = tools.poly_mutate(self.problem, sis)
-      kids += [NSGAPoint(sis)]
+      kids += [self.point(sis)]
     return clones + kids
 
   def populate(self):
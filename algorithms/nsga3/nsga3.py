@@ -4,26 +4,16 @@ sys.path.append(os.path.abspath("."))
 from utils.lib import *
 from algorithms.algorithm import Algorithm
 import utils.tools as tools
+from utils.sorting import sort_points
+from utils.distances import MAX_CELLS
 import numpy as np
-from copy import deepcopy
-from reference import DIVISIONS, cover
+import heapq
+from algorithms.nsga3.reference import DIVISIONS, cover
 from configs import nsga3_settings as default_settings
 from measures.igd import igd
 
 __author__ = 'george'
 
-def loo(points):
-  """
-  Iterator which generates a
-  test case and training set
-  :param points:
-  :return:
-  """
-  for i in range(len(points)):
-    one = points[i]
-    rest = points[:i] + points[i+1:]
-    yield one, rest
-
 class NSGAPoint(Point):
   def __init__(self, decisions, problem=None):
     """
@@ -33,8 +23,6 @@ class NSGAPoint(Point):
     """
     Point.__init__(self, decisions, problem)
     self.rank = 0
-    self.dominated = []
-    self.dominating = 0
     self.norm_objectives = None
     self.perpendicular = None
     self.reference_id = None
@@ -46,8 +34,30 @@ class NSGAPoint(Point):
     """
     new = NSGAPoint(self.decisions)
     new.objectives = self.objectives[:]
-    if self.norm_objectives:
+    if self.norm_objectives is not None:
       new.norm_objectives = self.norm_objectives[:]
+    new.constraint_status = self.constraint_status
+    return new
+
+
+class SlotNSGAPoint(SlotPoint):
+  """
+  Compact variant of NSGAPoint
+  """
+  __slots__ = ("rank", "perpendicular", "reference_id")
+
+  def __init__(self, decisions, problem=None):
+    SlotPoint.__init__(self, decisions, problem)
+    self.rank = 0
+    self.norm_objectives = None
+    self.perpendicular = None
+    self.reference_id = None
+
+  def clone(self):
+    new = SlotPoint.clone(self)
+    new.rank = 0
+    new.perpendicular = None
+    new.reference_id = None
     return new
 
 
@@ -73,23 +83,32 @@ class NSGA3(Algorithm):
     self.evolve = self._evolve
     self.population = population
     self.frontiers = []
+    self.point = SlotNSGAPoint if self.settings.slots else NSGAPoint
 
   def populate(self):
     return self.problem.populate(self.settings.pop_size)
 
   def run(self):
     start = get_time()
-    if not self.population:
-      self.population = self.populate()
-    population = [NSGAPoint(one) for one in self.population]
-    self.stat.update(population)
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+      population = state.population
+    else:
+      if not self.population:
+        self.population = self.populate()
+      population = [self.point(one) for one in self.population]
+      evaluate_points(population, self.problem, self.stat, 1)
+      self.stat.update(population)
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
       population = self.select(population)
       population = self.evolve(population)
       self.stat.update(population)
+      self.save_checkpoint(start, population=population)
       #print(self.gen, igd([one.objectives for one in population], self.problem.get_pareto_front()))
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return population
 
@@ -109,7 +128,7 @@ class NSGA3(Algorithm):
         if not mom == dad: break
       sis, _ = tools.sbx(self.problem, mom.decisions, dad.decisions)
       sis = tools.poly_mutate(self.problem, sis)
-      kids += [NSGAPoint(sis)]
+      kids += [self.point(sis)]
     return clones + kids
 
   def _evolve(self, population):
@@ -131,7 +150,7 @@ class NSGA3(Algorithm):
       pop_next += fronts[j]
     # If the top ranked solution is not satisfied the
     # entire batch is unsatisfied. Hence reducing unneccesary computation.
-    if not self.problem.check_constraints(s[0].decisions):
+    if not s[0].get_constraint_status(self.problem)[0]:
       return s[:self.settings.pop_size]
     s = self.normalize(s)
     references = self.get_references()
@@ -145,128 +164,92 @@ class NSGA3(Algorithm):
     :param - Population to sort
     :return - List of Frontiers
     """
-    frontiers = []
-    front1 = []
-    for one in population:
-      one.evaluate(self.problem, self.stat, self.gen)
-    for one, rest in loo(population):
-      for two in rest:
-        domination_status = tools.nsga_domination(self.problem, one, two)
-        if domination_status == 1:
-          one.dominated.append(two)
-        elif domination_status == 2:
-          one.dominating += 1
-      if one.dominating == 0:
-        one.rank = 1
-        front1.append(one)
-    current_rank = 1
-    frontiers.append(front1)
-    while True:
-      front2 = []
-      for one in front1:
-        for two in one.dominated:
-          two.dominating -= 1
-          if two.dominating == 0:
-            two.rank =  current_rank + 1
-            front2.append(two)
-      current_rank += 1
-      if len(front2) == 0 :
-        break
-      else :
-        frontiers.append(front2)
-        front1 = front2
+    evaluate_points(population, self.problem, self.stat, self.gen)
+    frontiers = sort_points(self.problem, population, self.settings.sorter)
+    for rank, frontier in enumerate(frontiers):
+      for one in frontier:
+        one.rank = rank + 1
     return frontiers
 
-  def get_ideal(self, population):
-    ideal = []
-    for i, obj in enumerate(self.problem.objectives):
-      f = min if obj.to_minimize else max
-      ideal.append(f([one.objectives[i] for one in population if self.problem.check_constraints(one.decisions)]))
-      #ideal.append(f([one.objectives[i] for one in population]))
-    return ideal
+  @staticmethod
+  def get_ideal(objectives, feasible):
+    """
+    Ideal point of the feasible points
+    :param objectives: (N x m) objective matrix. Minimized.
+    :param feasible: Vector(N) of booleans
+    :return: Vector(m)
+    """
+    return objectives[feasible].min(axis=0)
 
-  def get_worst(self, population):
-    worst = []
-    for i, obj in enumerate(self.problem.objectives):
-      f = max if obj.to_minimize else min
-      worst.append(f([one.objectives[i] for one in population if self.problem.check_constraints(one.decisions)]))
-      #worst.append(f([one.objectives[i] for one in population]))
-    return worst
+  @staticmethod
+  def get_worst(objectives, feasible):
+    """
+    Worst point of the feasible points
+    :param objectives: (N x m) objective matrix. Minimized.
+    :param feasible: Vector(N) of booleans
+    :return: Vector(m)
+    """
+    return objectives[feasible].max(axis=0)
 
-  def get_extremes(self, population, ideal):
-    def asf(point, index):
-      max_val = -sys.maxint
-      eps = 1e-6
-      for k, (o, idl) in enumerate(zip(point, ideal)):
-        temp = abs(o - idl)
-        if index != k:
-          temp /= eps
-        if temp > max_val:
-          max_val = temp
-      return max_val
-    extremes = []
-    for j, obj in enumerate(self.problem.objectives):
-      extreme_index = -1
-      min_val = sys.maxint
-      for i, one in enumerate(population):
-        asf_val = asf(one.objectives, j)
-        if asf_val < min_val:
-          min_val = asf_val
-          extreme_index = i
-      extremes += [population[extreme_index].objectives[:]]
-    return extremes
+  @staticmethod
+  def get_extremes(objectives, ideal):
+    """
+    Point minimizing the achievement scalarizing
+    function along each objective axis.
+    :param objectives: (N x m) objective matrix. Minimized.
+    :param ideal: Ideal point
+    :return: (m x m) matrix. Row j is the extreme point of axis j
+    """
+    m = len(ideal)
+    eps = 1e-6
+    weights = np.full((m, m), eps)
+    np.fill_diagonal(weights, 1)
+    # asf[i, j] = max_k |f_ik - z_k| / w_jk
+    asf = (np.abs(objectives - ideal)[:, None, :] / weights[None, :, :]).max(axis=2)
+    return objectives[asf.argmin(axis=0)]
 
-  def get_intercepts(self, extremes, ideal, worst):
+  @staticmethod
+  def get_intercepts(extremes, ideal, worst):
     """
     Get Intercepts of the extreme points on each
-    of the objective axis.
+    of the objective axis. Falls back to the worst
+    point if the extremes do not span a hyperplane
+    or if an intercept is not beyond the ideal point.
     :param extremes: Extreme points
     :param ideal: Ideal point
     :param worst: Worst point
     :return: Intercepts on each objective axis
     """
-    norm_extremes = []
-    for extreme in extremes:
-      norm_extremes.append([e-i for e, i in zip(extreme, ideal)])
-    norm_extremes = np.array(norm_extremes)
-    intercepts = [-1] * len(self.problem.objectives)
-    if np.linalg.matrix_rank(norm_extremes) == len(norm_extremes):
-      unit = np.matrix([[1]]*len(self.problem.objectives))
-      inv_extremes = np.linalg.inv(norm_extremes)
-      intercepts_coeff = inv_extremes.dot(unit)
-      intercepts_coeff = intercepts_coeff.tolist()
-      j = -1
-      for j, obj in enumerate(self.problem.objectives):
-        a_j = 1/intercepts_coeff[j][0] + ideal[j]
-        f = gt if obj.to_minimize else lt
-        if f(a_j, ideal[j]):
-          intercepts[j] = a_j
-        else:
-          break
-      if j != len(self.problem.objectives)-1:
-        intercepts = worst
-    else:
-      intercepts = worst
+    norm_extremes = extremes - ideal
+    if np.linalg.matrix_rank(norm_extremes) != len(norm_extremes):
+      return worst
+    try:
+      intercepts_coeff = np.linalg.solve(norm_extremes, np.ones(len(ideal)))
+    except np.linalg.LinAlgError:
+      return worst
+    with np.errstate(divide="ignore"):
+      intercepts = 1/intercepts_coeff + ideal
+    if not np.all(np.isfinite(intercepts) & (intercepts > ideal)):
+      return worst
     return intercepts
 
   def normalize(self, points):
     """
-    Normalize set of points
+    Normalize set of points. Maximized objectives
+    are negated so that every step minimizes.
     :param points:
     :return:
     """
-    ideal = self.get_ideal(points)
-    extremes = self.get_extremes(points, ideal)
-    worst = self.get_worst(points)
+    weights = np.array(self.problem.directional_weights(), dtype=float)
+    objectives = np.array([point.objectives for point in points], dtype=float) * weights
+    feasible = np.array([point.get_constraint_status(self.problem)[0] for point in points], dtype=bool)
+    ideal = self.get_ideal(objectives, feasible)
+    worst = self.get_worst(objectives, feasible)
+    extremes = self.get_extremes(objectives, ideal)
     intercepts = self.get_intercepts(extremes, ideal, worst)
-    for point in points:
-      norm_objectives = []
-      for i, o in enumerate(point.objectives):
-        if self.problem.objectives[i].to_minimize:
-          norm_objectives.append((o-ideal[i])/(intercepts[i] - ideal[i] + 0.0000001))
-        else:
-          norm_objectives.append((ideal[i]-o)/(ideal[i] - intercepts[i] + 0.0000001))
-      point.norm_objectives=norm_objectives
+    normalized = (objectives - ideal)/(intercepts - ideal + 0.0000001)
+    for point, norm_objectives in zip(points, normalized):
+      point.norm_objectives = norm_objectives
     return points
 
   @staticmethod
@@ -275,47 +258,59 @@ class NSGA3(Algorithm):
     Associate a set of points to a set of
     reference vectors
     :param population: List of NSGAPoint
-    :param references: List of reference vectors
+    :param references: (R x m) matrix of reference vectors
     :return: population with each normalized vector
     associated with a reference vector
     """
-    for point in population:
-      min_dist = sys.maxint
-      index = None
-      for i, reference in enumerate(references):
-        dist = NSGA3.perpendicular(point.norm_objectives, reference)
-        if dist < min_dist:
-          min_dist = dist
-          index = i
+    vectors = np.array([point.norm_objectives for point in population], dtype=float)
+    distances = NSGA3.perpendicular(vectors, references)
+    indices = distances.argmin(axis=1)
+    min_dists = distances[np.arange(len(population)), indices]
+    for point, index, min_dist in zip(population, indices.tolist(), min_dists.tolist()):
       point.perpendicular = min_dist
       point.reference_id = index
     return population
 
   @staticmethod
-  def perpendicular(vector, reference):
+  def perpendicular(vectors, references):
     """
-    Perpendicular distance between a
-    vector and its projection on a reference
-    :param vector: Point to be projected. List of float
-    :param reference: Reference to be projected on. List of float
-    :return:
+    Perpendicular distance between each vector and
+    its projection on each reference. Computed in
+    blocks of rows, one dimension at a time in the
+    order of the scalar formula so that the distances,
+    and hence ties, are the same floats.
+    :param vectors: (N x m) matrix of points to be projected
+    :param references: (R x m) matrix of reference vectors
+    :return: (N x R) matrix of distances
     """
-    projection = 0
-    reference_len = 0
-    for v, r in zip(vector, reference):
-      projection += v*r
-      reference_len += r**2
-    reference_len **= 0.5
-    projection = abs(projection)/reference_len
-    normal = 0
-    for v, r in zip(vector, reference):
-      normal += (v - projection*r/reference_len)**2
-    return normal**0.5
+    n, m = vectors.shape
+    # np.power calls pow like the ** of a float does. It is
+    # not always x*x or sqrt(x) to the last bit.
+    lengths = np.zeros(len(references))
+    for j in range(m):
+      lengths += np.power(references[:, j], 2.0)
+    lengths = np.power(lengths, 0.5)
+    distances = np.empty((n, len(references)))
+    size = max(1, MAX_CELLS // max(1, len(references)))
+    for start in range(0, n, size):
+      block = vectors[start:start + size]
+      projections = np.zeros((len(block), len(references)))
+      for j in range(m):
+        projections += block[:, j, None] * references[None, :, j]
+      projections = np.abs(projections) / lengths
+      squares = np.zeros_like(projections)
+      for j in range(m):
+        squares += np.power(block[:, j, None] - projections * references[None, :, j] / lengths, 2.0)
+      distances[start:start + size] = np.power(squares, 0.5)
+    return distances
 
   def niche(self, all_points, current_points, references):
     """
     Get Niche points for next generation from
-    population
+    population. Points of the last front are bucketed
+    by reference. A bucket is a heap on the perpendicular
+    distance, which is only needed until the first point
+    of the bucket is picked. Later picks are random.
     :param all_points: Points to select from
     :param current_points: Population
     :param references: Reference points
@@ -323,41 +318,33 @@ class NSGA3(Algorithm):
     """
     n = self.settings.pop_size
     k = n - len(current_points)
-    last_points = deepcopy(all_points[len(current_points):])
-    ref_counts = [0] * len(references)
-    ref_status = [False] * len(references)
+    last_points = all_points[len(current_points):]
+    ref_counts = np.zeros(len(references), dtype=int)
     for point in current_points:
       ref_counts[point.reference_id] += 1
+    buckets = {}
+    for index, point in enumerate(last_points):
+      buckets.setdefault(point.reference_id, []).append((point.perpendicular, index))
+    for bucket in buckets.values():
+      heapq.heapify(bucket)
+    # References with points left to pick
+    ref_status = np.zeros(len(references), dtype=bool)
+    ref_status[list(buckets)] = True
 
-    index = 0
-    while index < k:
-      ref_ids = shuffle(range(len(references)))
-      least = sys.maxint
-      ref_id = -1
-      for ref_index in ref_ids:
-        if not ref_status[ref_index] and ref_counts[ref_index] < least:
-          least = ref_counts[ref_index]
-          ref_id = ref_index
-      feasibles = []
-      for point in last_points:
-        if point.reference_id == ref_id:
-          feasibles.append(point)
-      if feasibles:
-        best_point = 0
-        if ref_counts[ref_id] == 0:
-          least_dist = sys.maxint
-          for point in feasibles:
-            if point.perpendicular < least_dist:
-              least_dist = point.perpendicular
-              best_point = point
-        else:
-          best_point = rand_one(feasibles)
-        current_points.append(best_point)
-        ref_counts[ref_id]+=1
-        last_points.remove(best_point)
-        index += 1
+    for _ in range(k):
+      least = ref_counts[ref_status].min()
+      ref_id = rand_one(np.flatnonzero(ref_status & (ref_counts == least)).tolist())
+      bucket = buckets[ref_id]
+      if ref_counts[ref_id] == 0:
+        _, index = heapq.heappop(bucket)
       else:
-        ref_status[ref_id] = True
+        pick = random.randrange(len(bucket))
+        bucket[pick], bucket[-1] = bucket[-1], bucket[pick]
+        _, index = bucket.pop()
+      current_points.append(last_points[index])
+      ref_counts[ref_id] += 1
+      if not bucket:
+        ref_status[ref_id] = False
     assert len(current_points) == self.settings.pop_size, "Oops population mismatch."
     return current_points
 
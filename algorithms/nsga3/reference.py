@@ -2,6 +2,8 @@ from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
 from utils.lib import *
+from itertools import combinations
+import numpy as np
 __author__ = 'george'
 
 DIVISIONS = {
@@ -21,7 +23,31 @@ class Coordinate(O):
     self.pts = []
 
 
+# Reference points shared by every algorithm instance in
+# the process. Keyed on (m, p_outer, p_inner).
+_CACHE = {}
+
+def compositions(m, p):
+  """
+  Every way of writing p as an ordered sum of m
+  non negative integers, in lexicographic order.
+  Stars and bars: choosing the positions of the
+  m-1 bars among p+m-1 slots gives one composition.
+  :param m: Number of parts
+  :param p: Sum of the parts
+  :return: (C(p+m-1, m-1) x m) integer matrix
+  """
+  bars = np.array(list(combinations(range(p + m - 1), m - 1)), dtype=int).reshape(-1, m - 1)
+  low = np.full((len(bars), 1), -1, dtype=int)
+  high = np.full((len(bars), 1), p + m - 1, dtype=int)
+  return np.diff(np.hstack([low, bars, high]), axis=1) - 1
+
 def splits(dim, div, outer=True):
+  """
+  Values a coordinate can take. The points of the
+  inner layer are shrunk by half towards the center
+  of the simplex.
+  """
   if outer:
     start = 0.0
     end = 1.0
@@ -31,46 +57,40 @@ def splits(dim, div, outer=True):
   delta = (end - start) / div
   return [start] + [start + i*delta for i in range(1, div)] + [end]
 
-def valid(coord, exact = False):
-  if exact:
-    return abs(sum(coord) - 1) < EPS
-  else:
-    return sum(coord) <= 1 + EPS
-
-def expand(coords, possible):
-  expanded  = []
-  for coord in coords:
-    for val in possible:
-      new = coord + [val]
-      if valid(new):
-        expanded.append(new)
-      else:
-        break
-  return expanded
-
-
 def reference(m, p, outer=True):
   """
   Create a set of reference points
   with m axes and p is the number of
-  divisions along each axis
+  divisions along each axis. Coordinates
+  are looked up in splits so that they are
+  the same floats on every layer and axis.
   :param m: Number of axis
   :param p: Number of divisions
-  :return:
+  :param outer: Outer or inner layer
+  :return: (R x m) matrix of reference points
   """
-  possible = splits(m, p, outer=outer)
-  coords = [[pt] for pt in possible]
-  for i in range(1, m):
-    coords = expand(coords, possible)
-  return [coord for coord in coords if valid(coord, exact=True)]
+  return np.array(splits(m, p, outer=outer))[compositions(m, p)]
 
 def cover(m, p_outer, p_inner=None):
-  ref = reference(m, p_outer)
-  if p_inner:
-    ref += reference(m, p_inner, outer=False)
-  return ref
+  """
+  Das and Dennis reference points on the unit
+  simplex with an optional inner layer. The result
+  is cached for the process and is read only.
+  :param m: Number of axis
+  :param p_outer: Number of divisions of the outer layer
+  :param p_inner: Number of divisions of the inner layer
+  :return: (R x m) matrix of reference points
+  """
+  key = (m, p_outer, p_inner or 0)
+  if key not in _CACHE:
+    ref = reference(m, p_outer)
+    if p_inner:
+      ref = np.vstack([ref, reference(m, p_inner, outer=False)])
+    ref.setflags(write=False)
+    _CACHE[key] = ref
+  return _CACHE[key]
 
 
 if __name__ == "__main__":
   x = cover(3, 12, 0)
-  print(len(x))
\ No newline at end of file
+  print(len(x))
@@ -5,6 +5,7 @@ from utils.lib import *
 from algorithms.algorithm import Algorithm
 from configs import spea2_settings as default_settings
 import utils.tools as tools
+from utils.sorting import point_matrix, domination_matrix
 from utils.distances import eucledian
 from measures.convergence import convergence
 import warnings
@@ -33,6 +34,7 @@ class SPEA2Point(Point):
     new = SPEA2Point(self.decisions)
     new.objectives = self.objectives[:]
     new.norm_objectives = self.norm_objectives[:]
+    new.constraint_status = self.constraint_status
     return new
 
 class SPEA2(Algorithm):
@@ -51,12 +53,16 @@ class SPEA2(Algorithm):
     Runner function that runs the SPEA2 algorithm
     """
     start = get_time()
-    if not self.population:
-      self.population = self.problem.populate(self.settings.pop_size)
-    self.population = [SPEA2Point(one, problem=self.problem) for one in self.population]
-    for point in self.population: point.evaluate(self.problem, self.stat, 1)
-    self.stat.update(self.population)
-    self.fit_all()
+    state = self.load_checkpoint()
+    if state:
+      start -= state.runtime
+    else:
+      if not self.population:
+        self.population = self.problem.populate(self.settings.pop_size)
+      self.population = [SPEA2Point(one, problem=self.problem) for one in self.population]
+      for point in self.population: point.evaluate(self.problem, self.stat, 1)
+      self.stat.update(self.population)
+      self.fit_all()
     while self.gen < self.settings.gens:
       say(".")
       self.gen += 1
@@ -66,49 +72,43 @@ class SPEA2(Algorithm):
       assert len(self.population) == self.settings.pop_size
       assert len(self.archive) == self.settings.archive_size
       print(self.gen, convergence([one.objectives for one in self.archive], self.problem.get_pareto_front()))
+      self.save_checkpoint(start)
+    self.finish_checkpoint()
     self.stat.runtime = get_time() - start
     return self.archive
 
 
   def fit_all(self):
-    for point in self.population + self.archive:
-      point.strength = self.calculate_strength(point)
-    for point in self.population + self.archive:
-      point.fitness = self.calculate_fitness(point)
-
-  def calculate_strength(self, point):
     """
-    Strength of a point is defined as the sum of the
-    points it dominates in population and archive.
-    :param point: Instance of SPEA2Point whose strength is calculated
-    :return: Strength of point
+    Strength of a point is the number of points it dominates
+    in population and archive. Raw fitness of a point is the
+    sum of the strengths of all the points that dominate it.
     """
-    strength = 0
-    for other in self.population + self.archive:
-      if tools.nsga_domination(self.problem, point, other) == 1:
-        strength += 1
-    return strength
+    points = self.population + self.archive
+    dominates = domination_matrix(*point_matrix(self.problem, points))
+    strengths = dominates.sum(axis=1)
+    raw_fitnesses = strengths.dot(dominates)
+    for point, strength, raw_fitness in zip(points, strengths.tolist(), raw_fitnesses.tolist()):
+      point.strength = strength
+      point.raw_fitness = raw_fitness
+    for point in points:
+      point.fitness = self.calculate_fitness(point)
 
   def calculate_fitness(self, point):
     """
-    Raw fitness of a point is defined as the sum of the
-    strengths of all points dominated by the point in
-    the population and archive
-    :param point: Instance of SPEA2Point whose raw fitness is calculated
-    :return: Raw Fitness of a point
+    Fitness of a point is its raw fitness plus
+    its density in the population and archive
+    :param point: Instance of SPEA2Point whose fitness is calculated
+    :return: Fitness of a point
     """
-    raw_fitness = 0
     distance_list = []
     k = int(round(math.sqrt(len(self.population) + len(self.archive))))
     for other in self.population + self.archive:
       if other == point: continue
       distance = eucledian(point.norm_objectives, other.norm_objectives)
       distance_list.append(distance)
-      if tools.nsga_domination(self.problem, point, other) == 2:
-        raw_fitness += other.strength
     k_nearest = sorted(distance_list)[k]
     point.density = 1 / (k_nearest + 2)
-    point.raw_fitness = raw_fitness
     return point.raw_fitness + point.density
 
   def environmental_selection(self):
@@ -160,11 +160,8 @@ class SPEA2(Algorithm):
       sis, bro = tools.sbx(self.problem, mom.decisions, dad.decisions, eta=self.settings.sbx_eta)
       sis = tools.poly_mutate(self.problem, sis, eta=self.settings.pm_eta)
       bro = tools.poly_mutate(self.problem, bro, eta=self.settings.pm_eta)
-      sis, bro = SPEA2Point(sis), SPEA2Point(bro)
-      sis.evaluate(self.problem, self.stat, self.gen)
-      bro.evaluate(self.problem, self.stat, self.gen)
-      population += [sis, bro]
-    return population
+      population += [SPEA2Point(sis), SPEA2Point(bro)]
+    return evaluate_points(population, self.problem, self.stat, self.gen)
 
 
 
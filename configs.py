@@ -9,6 +9,20 @@ __author__ = 'panzer'
 
 GENS = 400
 REPEATS = 5
+# Processes used by runner.py. None uses every CPU,
+# 1 runs the jobs one after the other in this process.
+WORKERS = 1
+# Base of the seed of every (problem, algorithm, repeat) job
+SEED = 1
+# Generations kept by Stat: "all", "final" or
+# k to keep every k-th generation and the final one.
+# Algorithms can override it with a "history" setting.
+HISTORY = "all"
+# Algorithms save a checkpoint to the file of their
+# "checkpoint" setting every CHECKPOINT_EVERY generations,
+# or every "checkpoint_every" generations if set, and
+# continue from it when the "resume" setting is True.
+CHECKPOINT_EVERY = 10
 
 def gale_settings():
   """
@@ -27,7 +41,10 @@ def nsga2_settings():
   """
   return O(
     pop_size = 100,  # Size of population
-    gens = GENS      # Number of generations
+    gens = GENS,     # Number of generations
+    sorter = "auto", # Non-dominated sort : auto, deb, sweep(2 objectives), jensen, ens_ss or ens_bs
+    steady_state = False, # (mu + 1) selection with incremental fronts
+    slots = False    # Use the compact SlotNSGAPoint
   )
 
 def nsga3_settings():
@@ -39,7 +56,9 @@ def nsga3_settings():
     gens = GENS,      # Number of generations
     cr = 1,           # Crossover rate for SBX
     nc = 30,          # eta for SBX
-    nm = 20           # eta for Mutation
+    nm = 20,          # eta for Mutation
+    sorter = "auto",  # Non-dominated sort : auto, deb, sweep(2 objectives), jensen, ens_ss or ens_bs
+    slots = False     # Use the compact SlotNSGAPoint
   )
 
 def de_settings():
@@ -68,7 +87,10 @@ def moead_settings():
     nc = 20,            # eta for SBX
     nm = 20,            # eta for Mutation
     de_np = 0.9,        # DE neighborhood probability
-    de_cr = 0.5         # DE crossover rate
+    de_cr = 0.5,        # DE crossover rate
+    synchronous = False, # Produce and evaluate all the offspring of a generation at once
+    workers = 1          # Processes evaluating the offspring when synchronous. None uses every CPU.
+                         # Jobs of a parallel runner.py always use 1.
   )
 
 def spea2_settings():
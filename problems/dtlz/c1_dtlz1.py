@@ -1,6 +1,7 @@
 from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
+from problems.problem import Constraint
 from dtlz1 import DTLZ1
 
 __author__ = 'george'
@@ -13,14 +14,15 @@ class C1_DTLZ1(DTLZ1):
   def __init__(self, m ,n = None):
     DTLZ1.__init__(self, m, n)
     self.name = "C1-DTLZ1"
+    self.constraints = [Constraint("C1")]
 
   def check_constraints(self, decisions):
-    f = self.evaluate(decisions)
-    c = 1 - (f[-1]/0.6) - sum(f[0:-1])/0.5
-    return c>=0
+    return self.evaluate_constraints(decisions)[0]
 
   def evaluate_constraints(self, decisions):
-    f = self.evaluate(decisions)
+    return self.constraints_from_objectives(decisions, self.evaluate(decisions))
+
+  def constraints_from_objectives(self, decisions, f):
     c = 1 - (f[-1]/0.6) - sum(f[0:-1])/0.5
     if c >= 0:
       return True, 0
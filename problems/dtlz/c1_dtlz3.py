@@ -1,6 +1,7 @@
 from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
+from problems.problem import Constraint
 from dtlz3 import DTLZ3
 
 __author__ = 'george'
@@ -13,16 +14,15 @@ class C1_DTLZ3(DTLZ3):
   def __init__(self, m ,n = None):
     DTLZ3.__init__(self, m, n)
     self.name = "C1-DTLZ3"
+    self.constraints = [Constraint("C1")]
 
   def check_constraints(self, decisions):
-    f = self.evaluate(decisions)
-    r = self.get_r()
-    sum_f = sum([f_i**2 for f_i in f])
-    c = (sum_f - 16) * (sum_f - r**2)
-    return c>=0
+    return self.evaluate_constraints(decisions)[0]
 
   def evaluate_constraints(self, decisions):
-    f = self.evaluate(decisions)
+    return self.constraints_from_objectives(decisions, self.evaluate(decisions))
+
+  def constraints_from_objectives(self, decisions, f):
     r = self.get_r()
     sum_f = sum([f_i**2 for f_i in f])
     c = (sum_f - 16) * (sum_f - r**2)
@@ -17,16 +17,12 @@ class C3_DTLZ1(DTLZ1):
     self.constraints = [Constraint("C"+str(i + 1)) for i in range(m)]
 
   def check_constraints(self, decisions):
-    f = self.evaluate(decisions)
-    f_sum = sum(f)
-    for f_i in f:
-      c_i = f_sum - f_i + (f_i/0.5) - 1
-      if c_i < 0:
-        return False
-    return True
+    return self.evaluate_constraints(decisions)[0]
 
   def evaluate_constraints(self, decisions):
-    f = self.evaluate(decisions)
+    return self.constraints_from_objectives(decisions, self.evaluate(decisions))
+
+  def constraints_from_objectives(self, decisions, f):
     f_sum = sum(f)
     c = 0
     for f_i in f:
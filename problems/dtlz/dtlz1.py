@@ -40,6 +40,19 @@ class DTLZ1(Problem):
         f[i] *= 1 - decisions[aux]
     return f
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    k = n - m + 1
+    tail = x[:, n-k:] - 0.5
+    g = 100 * (k + np.sum(tail**2 - np.cos(20.0 * PI * tail), axis=1))
+    # Column i holds (1+g)*0.5 times the product of the first i decisions
+    prods = np.cumprod(np.hstack([((1.0 + g) * 0.5)[:, None], x[:, :m-1]]), axis=1)
+    f = prods[:, ::-1].copy()
+    f[:, 1:] *= 1 - x[:, m-2::-1]
+    return f
+
   def get_pareto_front(self):
     file_name = "problems/dtlz/PF/dtlz1_"+str(len(self.objectives))+"_objectives.txt"
     pf = []
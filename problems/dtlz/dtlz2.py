@@ -5,6 +5,19 @@ from problems.problem import *
 
 __author__ = 'panzer'
 
+def spherical(radius, theta):
+  """
+  Map a batch of points onto a hyper-sphere.
+  f[i] = radius * cos(theta[0]) ... cos(theta[m-i-2]) * sin(theta[m-i-1])
+  :param radius: Vector(N) of radii
+  :param theta: (N x m-1) matrix of angles
+  :return: (N x m) matrix of objectives
+  """
+  cosines = np.cumprod(np.hstack([radius[:, None], np.cos(theta)]), axis=1)
+  f = cosines[:, ::-1].copy()
+  f[:, 1:] *= np.sin(theta[:, ::-1])
+  return f
+
 class DTLZ2(Problem):
   """
   Hypothetical test problem with
@@ -43,6 +56,14 @@ class DTLZ2(Problem):
         f[i] *= sin(decisions[m-(i+1)] * PI / 2)
     return f
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    k = n - m + 1
+    g = np.sum((x[:, n-k:] - 0.5)**2, axis=1)
+    return spherical(1 + g, x[:, :m-1] * PI / 2)
+
   def get_pareto_front(self):
     file_name = "problems/dtlz/PF/dtlz2_"+str(len(self.objectives))+"_objectives.txt"
     pf = []
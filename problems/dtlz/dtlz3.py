@@ -2,6 +2,7 @@ from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
 from problems.problem import *
+from dtlz2 import spherical
 
 __author__ = 'panzer'
 
@@ -44,6 +45,15 @@ class DTLZ3(Problem):
         f[i] *= sin(decisions[m-(i+1)] * PI / 2)
     return f
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    k = n - m + 1
+    tail = x[:, n-k:] - 0.5
+    g = 100 * (k + np.sum(tail**2 - np.cos(20.0 * PI * tail), axis=1))
+    return spherical(1 + g, x[:, :m-1] * PI / 2)
+
   def get_pareto_front(self):
     file_name = "problems/dtlz/PF/dtlz3_"+str(len(self.objectives))+"_objectives.txt"
     pf = []
@@ -2,6 +2,7 @@ from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
 from problems.problem import *
+from dtlz2 import spherical
 
 __author__ = 'panzer'
 
@@ -45,6 +46,14 @@ class DTLZ4(Problem):
         f[i] *= sin(d_alphas[m-(i+1)] * PI / 2)
     return f
 
+  def evaluate_batch(self, decisions):
+    d_alphas = np.asarray(decisions, dtype=float)**DTLZ4.alpha
+    m = len(self.objectives)
+    n = d_alphas.shape[1]
+    k = n - m + 1
+    g = np.sum((d_alphas[:, n-k:] - 0.5)**2, axis=1)
+    return spherical(1 + g, d_alphas[:, :m-1] * PI / 2)
+
   def get_pareto_front(self):
     file_name = "problems/dtlz/PF/dtlz4_"+str(len(self.objectives))+"_objectives.txt"
     pf = []
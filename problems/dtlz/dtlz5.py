@@ -2,6 +2,7 @@ from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
 from problems.problem import *
+from dtlz2 import spherical
 
 __author__ = 'panzer'
 
@@ -48,4 +49,16 @@ class DTLZ5(Problem):
         f[i] *= cos(theta[j])
       if i != 0:
         f[i] *= sin(theta[m-(i+1)])
-    return f
\ No newline at end of file
+    return f
+
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    k = n - m + 1
+    g = np.sum(x[:, n-k:]**0.1, axis=1)
+    t = PI / (4 * (1 + g))
+    theta = np.empty((len(x), m-1))
+    theta[:, 0] = x[:, 0]*PI/2
+    theta[:, 1:] = t[:, None] * (1 + 2*g[:, None]*x[:, 1:m-1])
+    return spherical(1 + g, theta)
@@ -44,4 +44,16 @@ class DTLZ6(Problem):
       h += f_i * (1 + sin(3*PI*f_i)) / (1 + g)
     h = m - h
     f.append((1 + g) * h)
-    return f
\ No newline at end of file
+    return f
+
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    k = n - m + 1
+    g = 1 + 9 * np.sum(x[:, n-k:], axis=1) / k
+    f = np.empty((len(x), m))
+    f[:, :m-1] = x[:, :m-1]
+    h = m - np.sum(f[:, :m-1] * (1 + np.sin(3*PI*f[:, :m-1])) / (1 + g)[:, None], axis=1)
+    f[:, m-1] = (1 + g) * h
+    return f
@@ -46,8 +46,22 @@ class DTLZ7(Problem):
       f.append(f_j)
     return f
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    m = len(self.objectives)
+    n = x.shape[1]
+    multiplier = 1/floor(n/m)
+    f = np.empty((len(x), m))
+    for j in range(m):
+      start = max(floor(j*n/m),0)
+      end = min(floor((j+1)*n/m),n-1)
+      f[:, j] = np.sum(x[:, start:end], axis=1) * multiplier
+    return f
+
   def evaluate_constraints(self, one):
-    f = self.evaluate(one)
+    return self.constraints_from_objectives(one, self.evaluate(one))
+
+  def constraints_from_objectives(self, one, f):
     m = len(f)
     status = True
     offset = 0
@@ -35,6 +35,17 @@ class PPS2(Problem):
     f2 = 1 - x[0]**0.5 + (2/len(j2_values)) * sum(j2_values)
     return [f1, f2]
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    n = x.shape[1]
+    j = np.arange(1, n)
+    x0 = x[:, :1]
+    values = (x[:, 1:] - np.sin(6*PI*x0 + (j+1)*PI/n)) ** 2
+    is_j2 = is_even(j+1)
+    f1 = x[:, 0] + (2/np.sum(~is_j2)) * np.sum(values[:, ~is_j2], axis=1)
+    f2 = 1 - x[:, 0]**0.5 + (2/np.sum(is_j2)) * np.sum(values[:, is_j2], axis=1)
+    return np.column_stack([f1, f2])
+
   def get_pareto_front(self):
     file_name = "problems/pps/PF/pps2.txt"
     pf = []
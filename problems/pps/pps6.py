@@ -41,6 +41,19 @@ class PPS6(Problem):
 
 
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    n = x.shape[1]
+    j = np.arange(1, n)
+    values = (x[:, 1:] - 2*x[:, 1:2]*np.sin(2*PI*x[:, :1] + (j+1)*PI/n))**2
+    is_j3 = (j+1) % 3 == 0
+    is_j2 = (j-1) % 3 == 0
+    is_j1 = j % 3 == 0
+    f1 = np.cos(0.5*PI*x[:, 0]) * np.cos(0.5*PI*x[:, 1]) + (2/np.sum(is_j1)) * np.sum(values[:, is_j1], axis=1)
+    f2 = np.cos(0.5*PI*x[:, 0]) * np.sin(0.5*PI*x[:, 1]) + (2/np.sum(is_j2)) * np.sum(values[:, is_j2], axis=1)
+    f3 = np.sin(0.5*PI*x[:, 0]) + (2/np.sum(is_j3)) * np.sum(values[:, is_j3], axis=1)
+    return np.column_stack([f1, f2, f3])
+
   def get_pareto_front(self):
     file_name = "problems/pps/PF/pps6.txt"
     pf = []
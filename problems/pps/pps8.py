@@ -41,6 +41,18 @@ class PPS8(Problem):
     f2 = 1 - x[0]**0.5 + (2/len(j2_values)) * (4*sum(y_j2_values) - 2*reduce(mul,j2_values,1) + 2)
     return [f1, f2]
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    n = x.shape[1]
+    j = np.arange(1, n)
+    x0 = x[:, :1]
+    y = x[:, 1:] - x0**(0.5*(1 + 3*(j-1)/n-2))
+    values = np.cos(20*y*PI/((j+1)**0.5))
+    is_j2 = is_even(j+1)
+    f1 = x[:, 0] + (2/np.sum(~is_j2)) * (4*np.sum(y[:, ~is_j2]**2, axis=1) - 2*np.prod(values[:, ~is_j2], axis=1) + 2)
+    f2 = 1 - x[:, 0]**0.5 + (2/np.sum(is_j2)) * (4*np.sum(y[:, is_j2]**2, axis=1) - 2*np.prod(values[:, is_j2], axis=1) + 2)
+    return np.column_stack([f1, f2])
+
   def get_pareto_front(self):
     file_name = "problems/pps/PF/pps8.txt"
     pf = []
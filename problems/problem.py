@@ -2,6 +2,7 @@ import sys
 import os
 sys.path.append(os.path.abspath("."))
 from utils.lib import *
+import numpy as np
 import matplotlib.pyplot as plt
 
 """
@@ -167,18 +168,61 @@ class Problem(O):
   def evaluate(self, decisions):
     pass
 
+  def evaluate_batch(self, decisions):
+    """
+    Evaluate a set of points in one call. Problems
+    that can be vectorized override this method,
+    others fall back to evaluating row by row.
+    :param decisions - (N x n) matrix of decisions
+    :return: (N x m) matrix of objectives
+    """
+    decisions = np.asarray(decisions, dtype=float)
+    objectives = [self.evaluate(one) for one in decisions.tolist()]
+    return np.array(objectives, dtype=float).reshape(len(decisions), len(self.objectives))
+
   def get_ideal_decisions(self, count = 500):
     return None
 
   def get_ideal_objectives(self, count = 500):
     return None
 
+  def is_constrained(self):
+    """
+    Check if the problem declares any constraints.
+    Unconstrained problems skip constraint handling.
+    :return: True/False
+    """
+    return len(self.constraints) > 0
+
   def evaluate_constraints(self, decisions):
     return True, 0
 
   def check_constraints(self, decisions):
     return True
 
+  def constraints_from_objectives(self, decisions, objectives):
+    """
+    Constraint status of a point whose objectives are
+    already known. Problems with constraints defined on
+    the objectives override this to avoid re-evaluating.
+    :param decisions - Decisions of the point
+    :param objectives - Objectives of the point
+    :return: (status, offset) as in evaluate_constraints
+    """
+    return self.evaluate_constraints(decisions)
+
+  def evaluate_with_constraints(self, decisions):
+    """
+    Evaluate the objectives and the constraints
+    of a point in one go.
+    :param decisions - Decisions of the point
+    :return: objectives, (status, offset)
+    """
+    objectives = self.evaluate(decisions)
+    if not self.is_constrained():
+      return objectives, FEASIBLE
+    return objectives, self.constraints_from_objectives(decisions, objectives)
+
   def better(self, one, two):
     """
     Function that checks which of the
@@ -25,6 +25,11 @@ class ZDT1(Problem):
     objectives = [decisions[0], g * (1 - sqrt(decisions[0]/g))]
     return objectives
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    g  = 1 + 9 * np.sum(x[:, 1:], axis=1) / (x.shape[1]-1)
+    return np.column_stack([x[:, 0], g * (1 - np.sqrt(x[:, 0]/g))])
+
   def get_pareto_front(self):
     file_name = "problems/zdt/PF/zdt1.txt"
     pf = []
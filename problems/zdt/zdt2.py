@@ -24,6 +24,11 @@ class ZDT2(Problem):
     objectives = [decisions[0], g * (1 - (decisions[0]/g)**2)]
     return objectives
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    g  = 1 + 9 * np.sum(x[:, 1:], axis=1) / (x.shape[1]-1)
+    return np.column_stack([x[:, 0], g * (1 - (x[:, 0]/g)**2)])
+
   def get_pareto_front(self):
     file_name = "problems/zdt/PF/zdt2.txt"
     pf = []
@@ -27,6 +27,13 @@ class ZDT3(Problem):
     objectives = [o0, o1]
     return objectives
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    g  = 1 + 9 * np.sum(x[:, 1:], axis=1) / (x.shape[1]-1)
+    o0 = x[:, 0]
+    o1 = g*(1 - np.sqrt(o0/g) - o0/g*np.sin(10*PI*o0))
+    return np.column_stack([o0, o1])
+
   def get_pareto_front(self):
     file_name = "problems/zdt/PF/zdt3.txt"
     pf = []
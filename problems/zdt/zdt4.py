@@ -33,6 +33,13 @@ class ZDT4(Problem):
       g_val += decisions[i]**2 - 10*cos(4*PI*decisions[i])
     return g_val
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    o0 = x[:, 0]
+    g = 1 + 10*(x.shape[1] - 1) + np.sum(x[:, 1:]**2 - 10*np.cos(4*PI*x[:, 1:]), axis=1)
+    o1 = g*(1 - (o0/g)**2)
+    return np.column_stack([o0, o1])
+
   def get_pareto_front(self):
     file_name = "problems/zdt/PF/zdt4.txt"
     pf = []
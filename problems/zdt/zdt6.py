@@ -30,6 +30,13 @@ class ZDT6(Problem):
   def g(decisions):
     return 1 + 9 * (sum(decisions[1:])/(len(decisions)-1))**0.25
 
+  def evaluate_batch(self, decisions):
+    x = np.asarray(decisions, dtype=float)
+    g = 1 + 9 * (np.sum(x[:, 1:], axis=1)/(x.shape[1]-1))**0.25
+    o0 = 1 - np.exp(-4*x[:, 0]) * (np.sin(6*PI*x[:, 0])**6)
+    o1 = 1 - (o0/g)**2
+    return np.column_stack([o0, o1])
+
   def get_pareto_front(self):
     file_name = "problems/zdt/PF/zdt6.txt"
     pf = []
@@ -1,9 +1,24 @@
+"""
+Run every problem with every algorithm REPEATS times.
+  python runner.py <expt_id> [workers] [resume]
+Each (problem, algorithm, repeat) is an independent
+job with its own seed and result file, so jobs are
+spread over a pool of processes when workers > 1.
+Jobs save checkpoints next to their result file and
+"resume" continues the interrupted ones from them.
+"""
 from __future__ import print_function, division
 import sys, os
 sys.path.append(os.path.abspath("."))
-from configs import REPEATS
+import random
+import time
+import zlib
+import numpy as np
+from multiprocessing import Pool, current_process
+from configs import REPEATS, WORKERS, SEED
 
 from utils.stat import Stat
+from utils.lib import Point
 
 # Problems
 from problems.dtlz.dtlz1 import DTLZ1
@@ -18,11 +33,11 @@ from problems.zdt.zdt1 import ZDT1
 # Optimizers
 from algorithms.nsga3.nsga3 import NSGA3
 from algorithms.nsga2.nsga2 import NSGA2
-from algorithms.gale.gale import GALE
+from algorithms.gale.GALE import GALE
 from algorithms.de.de import DE
 from algorithms.moead.moea_de import MOEA_DE
 from algorithms.moead.moea_tch import MOEA_TCH
-from algorithms.moead.moea_pbi import MOEA_PBI
+from algorithms.moead.MOEA_PBI import MOEA_PBI
 from algorithms.spea2.spea2 import SPEA2
 
 __author__ = 'panzer'
@@ -44,16 +59,84 @@ algorithms = [
   SPEA2,
 ]
 
-expt_id = sys.argv[1]
-for problem in problems:
-  print(problem.title())
-  for i in range(1):
-  #for i in range(REPEATS):
-    for algo in algorithms:
-      print(algo.__name__)
-      opt = algo(problem)
-      opt.run()
-      opt.stat.to_json(i+1)
-      print()
-      # Store and process solutions
-Stat.plot_experiment(expt_id)
\ No newline at end of file
+def get_jobs(resume=False):
+  """
+  :param resume: Continue the jobs from their checkpoints
+  :return: List of (problem index, algorithm index, repeat, resume)
+  """
+  return [(p, a, i + 1, resume) for p in range(len(problems))
+                        for i in range(REPEATS)
+                        for a in range(len(algorithms))]
+
+def get_seed(problem, algo, repeat):
+  """
+  Seed of a job. Depends only on the names and the
+  repeat so it does not change with the job order
+  or the number of workers.
+  """
+  key = "%s/%s/%d/%d" % (problem.title(), algo.__name__, repeat, SEED)
+  return zlib.crc32(key.encode("utf-8")) & 0x7fffffff
+
+def run_job(job):
+  """
+  Run one repeat of an algorithm on a problem
+  :param job: (problem index, algorithm index, repeat, resume)
+  :return: job, runtime in seconds
+  """
+  p, a, repeat, resume = job
+  problem, algo = problems[p], algorithms[a]
+  seed = get_seed(problem, algo, repeat)
+  random.seed(seed)
+  np.random.seed(seed)
+  # Ids key populations, e.g. in MOEA/D, so every
+  # job starts from the same ids as a fresh process
+  Point.id = 0
+  start = time.time()
+  opt = algo(problem)
+  if current_process().daemon and "workers" in opt.settings.has():
+    # Workers of the runner pool can not start pools of their own
+    opt.settings.update(workers=1)
+  checkpoint = opt.stat.get_result_file(repeat, extension="ckpt")
+  resume = resume and os.path.exists(checkpoint)
+  opt.settings.update(checkpoint=checkpoint, resume=resume)
+  opt.stat.stream(repeat, resume=resume)
+  opt.run()
+  opt.stat.close_stream()
+  return job, time.time() - start
+
+def describe(job):
+  p, a, repeat, _ = job
+  return "%s %s rep %d" % (problems[p].title(), algorithms[a].__name__, repeat)
+
+def run(jobs, workers):
+  """
+  Run the jobs and report the progress
+  :param jobs: List of jobs from get_jobs
+  :param workers: Number of processes. 1 runs in this process, None uses every CPU.
+  """
+  start = time.time()
+  if workers == 1:
+    results = (run_job(job) for job in jobs)
+    pool = None
+  else:
+    pool = Pool(workers)
+    results = pool.imap_unordered(run_job, jobs)
+  try:
+    for done, (job, runtime) in enumerate(results, 1):
+      elapsed = time.time() - start
+      eta = elapsed / done * (len(jobs) - done)
+      print("[%d/%d] %s : %.1fs, elapsed %.0fs, ETA %.0fs" %
+            (done, len(jobs), describe(job), runtime, elapsed, eta))
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+
+if __name__ == "__main__":
+  expt_id = Stat.get_expt_id()
+  workers = WORKERS
+  if len(sys.argv) > 2:
+    workers = int(sys.argv[2]) or None
+  resume = len(sys.argv) > 3 and sys.argv[3] == "resume"
+  run(get_jobs(resume), workers)
+  Stat.plot_experiment(expt_id)
@@ -0,0 +1,42 @@
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import unittest
+import numpy as np
+from algorithms.nsga3.nsga3 import NSGA3
+from algorithms.nsga3.reference import cover, DIVISIONS
+
+__author__ = 'panzer'
+
+def scalar_perpendicular(vector, reference):
+  """
+  Perpendicular distance of a vector to a
+  reference as computed for one pair at a time
+  """
+  projection = 0
+  reference_len = 0
+  for v, r in zip(vector, reference):
+    projection += v*r
+    reference_len += r**2
+  reference_len **= 0.5
+  projection = abs(projection)/reference_len
+  normal = 0
+  for v, r in zip(vector, reference):
+    normal += (v - projection*r/reference_len)**2
+  return normal**0.5
+
+
+class PerpendicularTest(unittest.TestCase):
+  def test_matches_scalar_distances(self):
+    np.random.seed(1)
+    for m in (3, 8):
+      references = cover(m, *DIVISIONS[m])
+      vectors = np.vstack([np.random.rand(60, m), 0.7 * references[:20]])
+      distances = NSGA3.perpendicular(vectors, references)
+      expected = [[scalar_perpendicular(vector, reference) for reference in references.tolist()]
+                  for vector in vectors.tolist()]
+      self.assertEqual(distances.tolist(), expected)
+
+
+if __name__ == "__main__":
+  unittest.main()
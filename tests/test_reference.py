@@ -0,0 +1,49 @@
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import unittest
+import numpy as np
+from utils.lib import EPS
+from algorithms.nsga3.reference import cover, splits, DIVISIONS
+
+__author__ = 'panzer'
+
+def recursive_reference(m, p, outer=True):
+  """
+  Reference points built one axis at a time
+  as cover did before the closed form
+  """
+  def valid(coord, exact=False):
+    if exact:
+      return abs(sum(coord) - 1) < EPS
+    return sum(coord) <= 1 + EPS
+  possible = splits(m, p, outer=outer)
+  coords = [[pt] for pt in possible]
+  for _ in range(1, m):
+    expanded = []
+    for coord in coords:
+      for val in possible:
+        if not valid(coord + [val]):
+          break
+        expanded.append(coord + [val])
+    coords = expanded
+  return [coord for coord in coords if valid(coord, exact=True)]
+
+
+class ReferenceTest(unittest.TestCase):
+  def test_matches_recursive_construction(self):
+    cases = [(3, p, 0) for p in (1, 2, 4, 12)] + [(m, p[0], p[1]) for m, p in DIVISIONS.items()]
+    for m, p_outer, p_inner in cases:
+      expected = recursive_reference(m, p_outer)
+      if p_inner:
+        expected += recursive_reference(m, p_inner, outer=False)
+      self.assertEqual(cover(m, p_outer, p_inner).tolist(), expected)
+
+  def test_cover_is_read_only(self):
+    ref = cover(3, 12)
+    self.assertTrue(ref is cover(3, 12))
+    self.assertRaises(ValueError, ref.__setitem__, (0, 0), 1.0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,75 @@
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import json
+import shutil
+import subprocess
+import unittest
+
+__author__ = 'panzer'
+
+EXPT_ID = "test_runner"
+
+def run_jobs(jobs):
+  """
+  Run jobs one after the other in this process
+  :param jobs: List of (problem index, algorithm index, repeat)
+  :return: Solutions of the summary of the last job
+  """
+  sys.argv = ["runner.py", EXPT_ID]
+  import runner
+  from problems.zdt.zdt1 import ZDT1
+  from problems.dtlz.dtlz2 import DTLZ2
+  from algorithms.moead.moea_tch import MOEA_TCH
+  from algorithms.nsga2.nsga2 import NSGA2
+  from utils.results import load_summary
+  class ShortTCH(MOEA_TCH):
+    def __init__(self, problem):
+      MOEA_TCH.__init__(self, problem, gens=3)
+  class ShortNSGA2(NSGA2):
+    def __init__(self, problem):
+      NSGA2.__init__(self, problem, gens=3)
+  runner.problems = [ZDT1(), DTLZ2(3)]
+  runner.algorithms = [ShortTCH, ShortNSGA2]
+  for p, a, repeat in jobs:
+    runner.run_job((p, a, repeat, False))
+  opt = runner.algorithms[a](runner.problems[p])
+  summary = load_summary(opt.stat.get_result_file(repeat, EXPT_ID, "jsonl"))
+  return {"ids" : summary["ids"], "objectives" : summary["objectives"]}
+
+
+class RunnerTest(unittest.TestCase):
+  def tearDown(self):
+    shutil.rmtree("results/%s" % EXPT_ID, ignore_errors=True)
+
+  def test_job_independent_of_previous_jobs(self):
+    for p in (0, 1):
+      fresh = json.loads(subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), str(p)]).splitlines()[-1])
+      after = run_jobs([(p, 1, 1), (p, 0, 1), (p, 0, 2)])
+      self.assertEqual(fresh, after)
+
+
+  def test_parallel_jobs_with_evaluation_pool(self):
+    sys.argv = ["runner.py", EXPT_ID]
+    import runner
+    from problems.dtlz.dtlz2 import DTLZ2
+    from algorithms.moead.moea_tch import MOEA_TCH
+    from utils.results import read_index
+    class PooledTCH(MOEA_TCH):
+      def __init__(self, problem):
+        MOEA_TCH.__init__(self, problem, gens=2, synchronous=True, workers=2)
+    runner.problems = [DTLZ2(3)]
+    runner.algorithms = [PooledTCH]
+    runner.run([(0, 0, 1, False), (0, 0, 2, False)], 2)
+    self.assertEqual([row["repeat"] for row in read_index(EXPT_ID)], [1, 2])
+
+
+if __name__ == "__main__":
+  if len(sys.argv) > 1:
+    # Run a single job in a fresh process
+    solutions = run_jobs([(int(sys.argv[1]), 0, 2)])
+    print()
+    print(json.dumps(solutions))
+  else:
+    unittest.main()
@@ -0,0 +1,43 @@
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import json
+import shutil
+import tempfile
+import unittest
+from utils.lib import O, Point
+from utils.stat import Stat
+from utils.results import ResultWriter
+from problems.zdt.zdt1 import ZDT1
+
+__author__ = 'panzer'
+
+class StatTest(unittest.TestCase):
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.folder)
+
+  def test_streamed_ideal_and_nadir(self):
+    problem = ZDT1()
+    problem.objectives[1].to_minimize = False
+    stat = Stat(problem, O(name="test", settings=None))
+    stat._writer = ResultWriter(os.path.join(self.folder, "rep_1.jsonl"))
+    population = []
+    for objectives in ([0.2, 3.0], [0.5, 1.0], [0.1, 2.0], []):
+      one = Point([0.5] * len(problem.decisions))
+      one.objectives = objectives
+      population.append(one)
+    stat.update(population)
+    stat._writer.close()
+    with open(stat._writer.file_name) as f:
+      record = json.loads(f.readlines()[-1])
+    self.assertEqual(record["size"], 4)
+    self.assertEqual(record["ideal"], [0.1, 3.0])
+    self.assertEqual(record["nadir"], [0.5, 1.0])
+    self.assertEqual(record["objectives"][-1], [])
+
+
+if __name__ == "__main__":
+  unittest.main()
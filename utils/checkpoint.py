@@ -0,0 +1,137 @@
+"""
+Checkpoints of a running algorithm. A checkpoint
+holds the attributes of the algorithm, the state
+passed by its run loop, the Stat counters and
+history, the position in the streamed result file,
+the point id counter and the state of both random
+number generators, so that a resumed run continues
+exactly like the original one.
+The snapshot is a zlib compressed pickle. It is
+taken in the generation loop and written to disk
+by a background thread.
+"""
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import inspect
+import random
+import threading
+import zlib
+from io import BytesIO
+import numpy as np
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+from utils.lib import O, Point
+from configs import CHECKPOINT_EVERY
+
+__author__ = 'panzer'
+
+# Attributes rebuilt by the constructor instead of restored
+SKIP = ("problem", "stat", "settings", "_checkpoint", "_writer")
+
+def attributes(obj):
+  """
+  Attributes of an object that are restored
+  from a checkpoint. Methods and functions are
+  set up again by the constructor.
+  """
+  return dict((key, value) for key, value in obj.__dict__.items()
+              if key not in SKIP and not inspect.ismethod(value)
+              and not inspect.isfunction(value))
+
+class Checkpoint(object):
+  def __init__(self, file_name, every=CHECKPOINT_EVERY):
+    """
+    :param file_name: Path of the checkpoint file
+    :param every: Save a checkpoint every "every" generations
+    """
+    self.file_name = file_name
+    self.every = every
+    self._thread = None
+
+  def due(self, gen):
+    return self.every > 0 and gen % self.every == 0
+
+  @staticmethod
+  def _shared(algorithm):
+    """
+    Objects referenced by the state but owned by the
+    live run. They are stored by name and resolved to
+    the objects of the resumed run.
+    """
+    return {"problem" : algorithm.problem, "stat" : algorithm.stat, "algorithm" : algorithm}
+
+  def save(self, algorithm, **state):
+    """
+    Take a snapshot and write it in the background
+    :param algorithm: Instance of the algorithm
+    :param state: Local state of the run loop
+    """
+    stat = algorithm.stat
+    snapshot = {
+      "algorithm" : attributes(algorithm),
+      "stat" : attributes(stat),
+      "stream" : stat._writer.tell() if stat._writer else None,
+      "point_id" : Point.id,
+      "random" : random.getstate(),
+      "numpy" : np.random.get_state(),
+      "state" : state
+    }
+    names = dict((id(obj), name) for name, obj in self._shared(algorithm).items())
+    buf = BytesIO()
+    pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = lambda obj: names.get(id(obj))
+    pickler.dump(snapshot)
+    # Pickled here so that later generations do not leak into
+    # the snapshot, compressed and written by the thread.
+    self.wait()
+    self._thread = threading.Thread(target=self._write, args=(buf.getvalue(),))
+    self._thread.start()
+
+  def _write(self, data):
+    temp = self.file_name + ".tmp"
+    with open(temp, "wb") as f:
+      f.write(zlib.compress(data, 1))
+    os.rename(temp, self.file_name)
+
+  def wait(self):
+    """
+    Wait for the checkpoint being written
+    """
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def load(self, algorithm):
+    """
+    Restore the last checkpoint into the algorithm.
+    :param algorithm: Instance of the algorithm
+    :return: O with the state saved by the run loop or None if there is no checkpoint
+    """
+    if not os.path.exists(self.file_name):
+      return None
+    with open(self.file_name, "rb") as f:
+      data = zlib.decompress(f.read())
+    shared = self._shared(algorithm)
+    unpickler = pickle.Unpickler(BytesIO(data))
+    unpickler.persistent_load = lambda name: shared[name]
+    snapshot = unpickler.load()
+    algorithm.__dict__.update(snapshot["algorithm"])
+    stat = algorithm.stat
+    stat.__dict__.update(snapshot["stat"])
+    if stat._writer and snapshot["stream"] is not None:
+      stat._writer.truncate(snapshot["stream"])
+    Point.id = snapshot["point_id"]
+    random.setstate(snapshot["random"])
+    np.random.set_state(snapshot["numpy"])
+    return O(**snapshot["state"])
+
+  def remove(self):
+    """
+    Delete the checkpoint once the run is over
+    """
+    self.wait()
+    if os.path.exists(self.file_name):
+      os.remove(self.file_name)
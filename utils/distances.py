@@ -1,8 +1,21 @@
 from __future__ import print_function,division
 import sys, os
 sys.path.append(os.path.abspath("."))
+import numpy as np
+try:
+  from scipy.spatial import cKDTree
+except ImportError:
+  cKDTree = None
 __author__ = 'panzer'
 
+# Number of vectors from which nearest_neighbors uses
+# a KD-tree instead of the pairwise distances, when
+# scipy is installed.
+KDTREE_SIZE = 2000
+# Largest number of (row, column, dimension) cells
+# of the pairwise differences computed at once.
+MAX_CELLS = 2**22
+
 def eucledian(one, two):
   """
   Compute Eucledian Distance between
@@ -30,3 +43,76 @@ def manhattan(one, two):
   for o_i, t_i in zip(one, two):
     dist += abs(o_i - t_i)
   return dist
+
+def crowding_distance(objectives):
+  """
+  Crowding distance of every point in a front.
+  For each objective the gap between the two
+  neighbours of a point is normalized by the range
+  of the objective. Boundary points are infinitely
+  far and objectives with no range add nothing.
+  :param objectives: (N x m) objective matrix of the front
+  :return: Vector(N) of crowding distances
+  """
+  objectives = np.asarray(objectives, dtype=float)
+  n, m = objectives.shape
+  distances = np.zeros(n)
+  if n <= 2:
+    distances[:] = float("inf")
+    return distances
+  order = np.argsort(objectives, axis=0, kind="mergesort")
+  ranked = np.take_along_axis(objectives, order, axis=0)
+  spread = ranked[-1] - ranked[0]
+  gaps = np.zeros_like(ranked)
+  np.divide(ranked[2:] - ranked[:-2], spread, out=gaps[1:-1], where=spread > 0)
+  gaps[0] = gaps[-1] = float("inf")
+  for i in range(m):
+    distances[order[:, i]] += gaps[:, i]
+  return distances
+
+def nearest_neighbors(vectors, k):
+  """
+  Nearest "k" other vectors of every vector by
+  eucledian distance. For up to KDTREE_SIZE vectors
+  the distances are computed in blocks of rows and
+  ties are broken on the lowest index. Larger sets
+  are queried on a KD-tree if scipy is installed,
+  where the order of ties is not defined.
+  :param vectors: (N x m) matrix
+  :param k: Number of neighbors. At most N-1 are returned.
+  :return: (N x k) integer matrix of row indices, nearest first
+  """
+  vectors = np.asarray(vectors, dtype=float)
+  n, m = vectors.shape
+  k = min(k, n - 1)
+  if k <= 0:
+    return np.empty((n, 0), dtype=int)
+  if n > KDTREE_SIZE and cKDTree is not None:
+    _, indices = cKDTree(vectors).query(vectors, k + 1)
+    # Drop the vector itself, or the farthest one if a
+    # duplicate of the vector was returned in its place
+    keep = indices != np.arange(n)[:, None]
+    keep[keep.all(axis=1), -1] = False
+    return indices[keep].reshape(n, k)
+  neighbors = np.empty((n, k), dtype=int)
+  size = max(1, MAX_CELLS // max(1, n * m))
+  for start in range(0, n, size):
+    end = min(start + size, n)
+    # Summed one dimension at a time and square rooted as in
+    # eucledian so that the distances, and hence ties, match
+    distances = np.zeros((end - start, n))
+    for j in range(m):
+      distances += (vectors[start:end, j, None] - vectors[None, :, j]) ** 2
+    distances = np.sqrt(distances)
+    distances[np.arange(end - start), np.arange(start, end)] = np.inf
+    # Every vector no farther than the k-th nearest, sorted
+    # on (row, distance, index) and cut to k per row.
+    kth = np.partition(distances, k - 1, axis=1)[:, k - 1:k]
+    rows, columns = np.nonzero(distances <= kth)
+    order = np.lexsort((columns, distances[rows, columns], rows))
+    rows, columns = rows[order], columns[order]
+    firsts = np.searchsorted(rows, np.arange(end - start))
+    positions = np.arange(len(rows)) - firsts[rows]
+    selected = positions < k
+    neighbors[start:end] = columns[selected].reshape(end - start, k)
+  return neighbors
@@ -0,0 +1,167 @@
+"""
+Non-dominated fronts maintained incrementally
+for steady state algorithms that add and remove
+one point at a time.
+"""
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import numpy as np
+from utils.lib import O
+from utils.sorting import constrained_dominates
+
+__author__ = 'panzer'
+
+class Fronts(O):
+  """
+  Non-dominated fronts updated one point at a time.
+  An insertion or a deletion moves points by at most
+  one front, so only the points dominated by the moved
+  ones are compared against the next front instead of
+  sorting the whole set again.
+  .. [Li2017] Li, Deb, Zhang and Kwong, "Efficient Nondomination Level
+     Update Method for Steady-State Evolutionary Multiobjective
+     Optimization", 2017.
+  Objectives are minimized. Points are referred to by the
+  integer id returned on insertion.
+  """
+  def __init__(self, m, constrained=False):
+    """
+    :param m: Number of objectives
+    :param constrained: If constraint violations are used for domination
+    """
+    O.__init__(self)
+    self.constrained = constrained
+    self.objectives = np.empty((16, m))
+    self.violations = np.zeros(16)
+    self.items = {}
+    self.ranks = {}
+    self.fronts = []
+    self.free = []
+
+  def __len__(self):
+    return len(self.items)
+
+  def __getitem__(self, key):
+    return self.items[key]
+
+  def rank(self, key):
+    """
+    :param key: Id of the point
+    :return: Index of the front of the point. 0 is the best front.
+    """
+    return self.ranks[key]
+
+  def front(self, rank):
+    """
+    :param rank: Index of the front
+    :return: List of ids in the front
+    """
+    return self.fronts[rank]
+
+  def values(self):
+    """
+    :return: Items of every point, best fronts first
+    """
+    return [self.items[key] for front in self.fronts for key in front]
+
+  def insert(self, item, objectives, violation=0):
+    """
+    Add a point. Points of its front that it dominates
+    move to the next front, which may in turn push points
+    of that front one level down.
+    :param item: Object stored with the point
+    :param objectives: Vector(m) of objectives
+    :param violation: Constraint violation. 0 if feasible.
+    :return: Id of the point
+    """
+    key = self._allocate(objectives, violation)
+    self.items[key] = item
+    rank = self._find_rank(key)
+    moving = [key]
+    while moving:
+      if rank == len(self.fronts):
+        self.fronts.append(moving)
+        self._set_rank(moving, rank)
+        break
+      front = self.fronts[rank]
+      dominated = self._dominated_by(moving, front)
+      self.fronts[rank] = [one for one, flag in zip(front, dominated) if not flag] + moving
+      self._set_rank(moving, rank)
+      moving = [one for one, flag in zip(front, dominated) if flag]
+      rank += 1
+    return key
+
+  def delete(self, key):
+    """
+    Remove a point. Points of the next front that were
+    dominated only by it move up, which may in turn free
+    points further down.
+    :param key: Id of the point
+    :return: Item of the point
+    """
+    rank = self.ranks.pop(key)
+    self.fronts[rank].remove(key)
+    removed = [key]
+    while removed and rank + 1 < len(self.fronts):
+      below = self.fronts[rank + 1]
+      candidates = [one for one, flag in zip(below, self._dominated_by(removed, below)) if flag]
+      if candidates and self.fronts[rank]:
+        candidates = [one for one, flag in zip(candidates, self._dominated_by(self.fronts[rank], candidates))
+                      if not flag]
+      if candidates:
+        promoted = set(candidates)
+        self.fronts[rank + 1] = [one for one in below if one not in promoted]
+        self.fronts[rank] += candidates
+        self._set_rank(candidates, rank)
+      removed = candidates
+      rank += 1
+    while self.fronts and not self.fronts[-1]:
+      self.fronts.pop()
+    self.free.append(key)
+    return self.items.pop(key)
+
+  def _allocate(self, objectives, violation):
+    if self.free:
+      key = self.free.pop()
+    else:
+      key = len(self.items)
+      if key == len(self.objectives):
+        self.objectives = np.vstack([self.objectives, np.empty_like(self.objectives)])
+        self.violations = np.concatenate([self.violations, np.zeros_like(self.violations)])
+    self.objectives[key] = objectives
+    self.violations[key] = violation
+    return key
+
+  def _set_rank(self, keys, rank):
+    for key in keys:
+      self.ranks[key] = rank
+
+  def _dominated_by(self, dominators, keys):
+    """
+    :return: Vector of booleans. True if the point of "keys"
+    is dominated by at least one point of "dominators"
+    """
+    if not dominators or not keys:
+      return np.zeros(len(keys), dtype=bool)
+    if self.constrained:
+      matrix = constrained_dominates(self.objectives[dominators], self.objectives[keys],
+                                     self.violations[dominators], self.violations[keys])
+    else:
+      matrix = constrained_dominates(self.objectives[dominators], self.objectives[keys])
+    return matrix.any(axis=0)
+
+  def _find_rank(self, key):
+    """
+    Binary search for the first front with no point
+    dominating "key". If a front does not dominate a
+    point, the fronts after it do not either.
+    """
+    low, high = 0, len(self.fronts)
+    while low < high:
+      mid = (low + high) // 2
+      if self._dominated_by(self.fronts[mid], [key])[0]:
+        low = mid + 1
+      else:
+        high = mid
+    return low
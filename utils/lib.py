@@ -5,12 +5,14 @@ import random
 import math
 import time
 import json
+import multiprocessing
 import numpy as np
 
 __author__ = 'panzer'
 
 PI = math.pi
 EPS = 0.000001
+FEASIBLE = (True, 0)
 
 def cos(x):
   return math.cos(x)
@@ -271,6 +273,53 @@ def drange(start, end, num=100, end_point = True):
     temp += delta
   return values
 
+def _init_point(point, decisions, problem=None):
+  """
+  Set the fields of a new point, shared
+  by Point and SlotPoint
+  :param point: Point being created
+  :param decisions: Set of decisions
+  :param problem: Instance of the problem. The point is evaluated if set.
+  """
+  Point.id += 1
+  point.id = Point.id
+  point.decisions = decisions[:]
+  if problem:
+    point.objectives, point.constraint_status = problem.evaluate_with_constraints(decisions)
+    point.norm_objectives = problem.norm(point.objectives)
+  else:
+    point.objectives = []
+    point.norm_objectives = []
+    point.constraint_status = None
+
+def _evaluate_point(point, problem, stat=None, gen=None):
+  """
+  Evaluate a point unless it has objectives
+  :param point: Point or SlotPoint
+  :param problem: Problem used to evaluate
+  """
+  if not point.objectives:
+    point.objectives, point.constraint_status = problem.evaluate_with_constraints(point.decisions)
+    point.norm_objectives = problem.norm(point.objectives)
+    count_evals(stat, gen)
+
+def _constraint_status(point, problem):
+  """
+  Constraint status of a point. Computed once
+  when the point is evaluated and reused after that.
+  :param point: Point or SlotPoint
+  :param problem: Problem the point belongs to
+  :return: (status, offset)
+  """
+  if point.constraint_status is None:
+    if not problem.is_constrained():
+      point.constraint_status = FEASIBLE
+    elif point.objectives:
+      point.constraint_status = problem.constraints_from_objectives(point.decisions, point.objectives)
+    else:
+      point.constraint_status = problem.evaluate_constraints(point.decisions)
+  return point.constraint_status
+
 class Point(O):
   id = 0
   def __init__(self, decisions, problem=None):
@@ -280,15 +329,7 @@ class Point(O):
     :param problem: Instance of the problem
     """
     O.__init__(self)
-    Point.id += 1
-    self.id = Point.id
-    self.decisions = decisions[:]
-    if problem:
-      self.objectives = problem.evaluate(decisions)
-      self.norm_objectives = problem.norm(self.objectives)
-    else:
-      self.objectives = []
-      self.norm_objectives = []
+    _init_point(self, decisions, problem)
 
   def clone(self):
     """
@@ -298,6 +339,7 @@ class Point(O):
     new = Point(self.decisions)
     new.objectives = self.objectives[:]
     new.norm_objectives = self.norm_objectives[:]
+    new.constraint_status = self.constraint_status
     return new
 
   def evaluate(self, problem, stat = None, gen = None):
@@ -305,18 +347,16 @@ class Point(O):
     Evaluate a point
     :param problem: Problem used to evaluate
     """
-    if not self.objectives:
-      self.objectives = problem.evaluate(self.decisions)
-      self.norm_objectives = problem.norm(self.objectives)
-      if stat:
-        stat.evals+=1
-        if gen is not None:
-          if stat.gen_evals is None:
-            stat.gen_evals = []
-          if len(stat.gen_evals) == gen:
-            stat.gen_evals[gen-1] += 1
-          else:
-            stat.gen_evals.append(1)
+    _evaluate_point(self, problem, stat, gen)
+
+  def get_constraint_status(self, problem):
+    """
+    Constraint status of the point. Computed once
+    when the point is evaluated and reused after that.
+    :param problem: Problem the point belongs to
+    :return: (status, offset)
+    """
+    return _constraint_status(self, problem)
 
   def __eq__(self, other):
     return self.decisions == other.decisions
@@ -324,6 +364,350 @@ class Point(O):
   def __hash__(self):
     return hash(frozenset(self.decisions))
 
+class SlotPoint(object):
+  """
+  Compact counterpart of Point. Fields are declared in
+  __slots__ so instances carry no __dict__ and clone
+  copies the fields directly. Subclasses declare their
+  extra fields in __slots__ as well. Ids are drawn from
+  the same counter as Point.
+  """
+  __slots__ = ("id", "decisions", "objectives", "norm_objectives", "constraint_status")
+
+  def __init__(self, decisions, problem=None):
+    """
+    :param decisions: Set of decisions
+    :param problem: Instance of the problem
+    """
+    _init_point(self, decisions, problem)
+
+  def clone(self):
+    """
+    Method to clone a point. Fields of
+    subclasses are left unset.
+    :return:
+    """
+    new = self.__class__.__new__(self.__class__)
+    Point.id += 1
+    new.id = Point.id
+    new.decisions = self.decisions[:]
+    new.objectives = self.objectives[:]
+    new.norm_objectives = None if self.norm_objectives is None else self.norm_objectives[:]
+    new.constraint_status = self.constraint_status
+    return new
+
+  def evaluate(self, problem, stat = None, gen = None):
+    """
+    Evaluate a point
+    :param problem: Problem used to evaluate
+    """
+    _evaluate_point(self, problem, stat, gen)
+
+  def get_constraint_status(self, problem):
+    """
+    Constraint status of the point. See Point.get_constraint_status
+    :param problem: Problem the point belongs to
+    :return: (status, offset)
+    """
+    return _constraint_status(self, problem)
+
+  def __eq__(self, other):
+    return self.decisions == other.decisions
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return hash(frozenset(self.decisions))
+
+  def __repr__(self):
+    return "{:id %s :decisions %s :objectives %s}" % (self.id, self.decisions, self.objectives)
+
+def count_evals(stat, gen=None, count=1):
+  """
+  Record evaluations on the statistics object
+  :param stat: Instance of Stat. Ignored if None
+  :param gen: Generation in which the evaluations happened
+  :param count: Number of evaluations
+  """
+  if not stat:
+    return
+  stat.evals += count
+  if gen is not None:
+    if stat.gen_evals is None:
+      stat.gen_evals = []
+    if len(stat.gen_evals) == gen:
+      stat.gen_evals[gen-1] += count
+    else:
+      stat.gen_evals.append(count)
+
+# Problem of the worker processes of an evaluation pool
+_pool_problem = None
+
+def _set_pool_problem(problem):
+  global _pool_problem
+  _pool_problem = problem
+
+def _evaluate_rows(decisions):
+  # Through evaluate_batch so that a point gets the
+  # same objectives with or without a pool
+  return _pool_problem.evaluate_batch(decisions).tolist()
+
+def evaluation_pool(problem, processes=None):
+  """
+  Pool of processes for evaluate_points. The problem
+  is sent once to every worker when it starts.
+  :param problem: Problem used to evaluate
+  :param processes: Number of processes. Number of CPUs if None.
+  :return: multiprocessing.Pool
+  """
+  return multiprocessing.Pool(processes, initializer=_set_pool_problem, initargs=(problem,))
+
+def evaluate_points(points, problem, stat=None, gen=None, pool=None):
+  """
+  Evaluate all the points that are not yet
+  evaluated with a single batch call to the problem,
+  or spread over a pool of processes if given.
+  :param points: List of Point
+  :param problem: Problem used to evaluate
+  :param stat: Instance of Stat to record the evaluations
+  :param gen: Current generation
+  :param pool: Pool from evaluation_pool for the same problem
+  :return: points
+  """
+  pending = [one for one in points if not one.objectives]
+  if not pending:
+    return points
+  if pool is None:
+    objectives = problem.evaluate_batch([one.decisions for one in pending])
+  else:
+    # A few chunks of rows per process
+    chunks = np.array_split(np.array([one.decisions for one in pending], dtype=float),
+                            min(len(pending), 4 * multiprocessing.cpu_count()))
+    objectives = np.array([objs for chunk in pool.map(_evaluate_rows, chunks) for objs in chunk], dtype=float)
+  is_constrained = problem.is_constrained()
+  for one, objs in zip(pending, objectives.tolist()):
+    one.objectives = objs
+    one.norm_objectives = problem.norm(objs)
+    if is_constrained:
+      one.constraint_status = problem.constraints_from_objectives(one.decisions, objs)
+    else:
+      one.constraint_status = FEASIBLE
+  count_evals(stat, gen, len(pending))
+  return points
+
+class PointView(object):
+  """
+  Lightweight per-point access to a row of a Population.
+  Attributes read and write the arrays of the population.
+  """
+  __slots__ = ("population", "index")
+
+  def __init__(self, population, index):
+    self.population = population
+    self.index = index
+
+  @property
+  def id(self):
+    return self.population.ids[self.index]
+
+  @property
+  def decisions(self):
+    return self.population.decisions[self.index]
+
+  @property
+  def objectives(self):
+    return self.population.objectives[self.index]
+
+  @property
+  def norm_objectives(self):
+    return self.population.norm_objectives[self.index]
+
+  @property
+  def violation(self):
+    return self.population.violations[self.index]
+
+  @property
+  def rank(self):
+    return self.population.ranks[self.index]
+
+  @property
+  def crowd_dist(self):
+    return self.population.crowding[self.index]
+
+  def __repr__(self):
+    return "PointView(%d of %d)" % (self.index, len(self.population))
+
+
+class Population(O):
+  """
+  A population stored as contiguous arrays. Row i of
+  every array belongs to the same individual. Use
+  indexing with an integer for a PointView and with a
+  slice, mask or index array for a sub population.
+  Ids are drawn from the same counter as Point.
+  """
+  def __init__(self, decisions, m):
+    """
+    :param decisions: (N x n) decisions
+    :param m: Number of objectives
+    """
+    O.__init__(self)
+    self.decisions = np.array(decisions, dtype=float)
+    n = len(self.decisions)
+    self.objectives = np.full((n, m), np.nan)
+    self.norm_objectives = np.full((n, m), np.nan)
+    self.violations = np.zeros(n)
+    self.evaluated = np.zeros(n, dtype=bool)
+    self.ranks = np.zeros(n, dtype=int)
+    self.crowding = np.zeros(n)
+    self.ids = np.arange(Point.id + 1, Point.id + 1 + n)
+    Point.id += n
+
+  @staticmethod
+  def from_points(points, problem):
+    """
+    Population from a list of points. Evaluated
+    points keep their objectives and constraint status.
+    :param points: List of Point
+    :param problem: Problem of the points
+    :return: Population
+    """
+    n, m = len(points), len(problem.objectives)
+    # Built from arrays so that the points keep their
+    # ids without drawing new ones from Point.id
+    population = Population.from_arrays({
+      "decisions" : np.array([one.decisions for one in points], dtype=float).reshape(n, len(problem.decisions)),
+      "objectives" : np.full((n, m), np.nan),
+      "norm_objectives" : np.full((n, m), np.nan),
+      "violations" : np.zeros(n),
+      "evaluated" : np.zeros(n, dtype=bool),
+      "ranks" : np.zeros(n, dtype=int),
+      "crowding" : np.zeros(n),
+      "ids" : np.array([one.id for one in points], dtype=int)
+    })
+    for i, one in enumerate(points):
+      if one.objectives:
+        population.objectives[i] = one.objectives
+        population.norm_objectives[i] = problem.norm(one.objectives)
+        status, offset = one.get_constraint_status(problem)
+        population.violations[i] = 0 if status else offset
+        population.evaluated[i] = True
+    return population
+
+  @staticmethod
+  def concatenate(populations):
+    """
+    Stack populations one after the other
+    :param populations: List of Population
+    :return: Population
+    """
+    return Population.from_arrays(dict((key, np.concatenate([getattr(one, key) for one in populations]))
+                                       for key in Population.fields()))
+
+  @staticmethod
+  def from_arrays(arrays):
+    """
+    Population holding the given arrays
+    :param arrays: Dictionary with an array for each of Population.fields()
+    :return: Population
+    """
+    population = Population(np.empty((0, arrays["decisions"].shape[1])), arrays["objectives"].shape[1])
+    return population.update(**arrays)
+
+  @staticmethod
+  def fields():
+    return ["decisions", "objectives", "norm_objectives", "violations",
+            "evaluated", "ranks", "crowding", "ids"]
+
+  def __len__(self):
+    return len(self.decisions)
+
+  def __iter__(self):
+    for i in range(len(self)):
+      yield PointView(self, i)
+
+  def __getitem__(self, item):
+    if isinstance(item, (int, np.integer)):
+      return PointView(self, item)
+    return Population.from_arrays(dict((key, getattr(self, key)[item]) for key in Population.fields()))
+
+  def evaluate(self, problem, stat=None, gen=None):
+    """
+    Evaluate every row that is not yet evaluated
+    with a single batch call to the problem.
+    :param problem: Problem used to evaluate
+    :param stat: Instance of Stat to record the evaluations
+    :param gen: Current generation
+    :return: self
+    """
+    pending = np.flatnonzero(~self.evaluated)
+    if not len(pending):
+      return self
+    objectives = problem.evaluate_batch(self.decisions[pending])
+    self.objectives[pending] = objectives
+    for j, obj in enumerate(problem.objectives):
+      if obj.low is None or obj.high is None:
+        self.norm_objectives[pending, j] = objectives[:, j]
+      else:
+        self.norm_objectives[pending, j] = np.clip((objectives[:, j] - obj.low)/(obj.high - obj.low + EPS), 0, 1)
+    if problem.is_constrained():
+      for i, objs in zip(pending.tolist(), objectives.tolist()):
+        status, offset = problem.constraints_from_objectives(self.decisions[i].tolist(), objs)
+        self.violations[i] = 0 if status else offset
+    self.evaluated[pending] = True
+    count_evals(stat, gen, len(pending))
+    return self
+
+  def feasible(self):
+    """
+    :return: Vector of booleans. True for feasible rows
+    """
+    return self.violations <= 0
+
+  def sort(self, problem, method="auto"):
+    """
+    Non-dominated sort of the population. Sets
+    the ranks, 1 being the best front.
+    :param problem: Problem of the population
+    :param method: Name of the sorting method or "auto"
+    :return: List of fronts. Each front is a list of row indices.
+    """
+    from utils.sorting import non_dominated_sort
+    objectives = self.objectives * problem.directional_weights()
+    violations = self.violations if problem.is_constrained() else None
+    fronts = non_dominated_sort(objectives, violations, method)
+    for rank, front in enumerate(fronts):
+      self.ranks[front] = rank + 1
+    return fronts
+
+  def assign_crowding(self, rows):
+    """
+    Crowding distance of a front
+    :param rows: Row indices of the front
+    :return: Vector of crowding distances
+    """
+    from utils.distances import crowding_distance
+    self.crowding[rows] = crowding_distance(self.objectives[rows])
+    return self.crowding[rows]
+
+  def to_points(self, point_class=Point):
+    """
+    Points holding a copy of each row
+    :param point_class: Class of the points. Point or a subclass.
+    :return: List of points
+    """
+    points = []
+    for i in range(len(self)):
+      one = point_class(self.decisions[i].tolist())
+      one.id = int(self.ids[i])
+      if self.evaluated[i]:
+        one.objectives = self.objectives[i].tolist()
+        one.norm_objectives = self.norm_objectives[i].tolist()
+        one.constraint_status = FEASIBLE if self.violations[i] <= 0 else (False, float(self.violations[i]))
+      points.append(one)
+    return points
+
 def is_even(i):
   """
   Checks if "i" is even
@@ -345,8 +729,12 @@ def mkdir(directory):
   :param directory:
   :return:
   """
-  if not os.path.exists(directory):
+  try:
     os.makedirs(directory)
+  except OSError:
+    # Created meanwhile by another process
+    if not os.path.isdir(directory):
+      raise
 
 def get_subdirectories(base_dir):
   """
@@ -394,4 +782,4 @@ def loo(points):
   for i in range(len(points)):
     one = points[i]
     rest = points[:i] + points[i+1:]
-    yield one, rest
\ No newline at end of file
+    yield one, rest
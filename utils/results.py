@@ -0,0 +1,294 @@
+"""
+Result files.
+- Line delimited: every line is a JSON record written
+  and flushed as soon as it is produced so that a run
+  that crashes keeps every generation written so far.
+- Columnar: a folder with one .npy file per array,
+  which can be memory mapped, and a small meta.json
+  with the scalar metrics.
+Every experiment keeps an index with the scalar
+metrics of each repeat in results/<expt_id>/index.jsonl.
+Rebuild it from the result files with
+  python utils/results.py rebuild <expt_id> [processes]
+"""
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import json
+import numpy as np
+import re
+from multiprocessing import Pool
+from utils.lib import mkdir, get_json, get_subdirectories, ls
+
+__author__ = 'panzer'
+
+class ResultWriter(object):
+  """
+  Append records to a line delimited JSON file.
+  Points are stored column wise, one list of ids,
+  decisions and objectives per generation, without
+  indentation or spaces.
+  """
+  def __init__(self, file_name, metrics_only=False, digits=None, append=False):
+    """
+    :param file_name: Path of the file. Folders are created.
+    :param metrics_only: Skip the points and write metrics only
+    :param digits: Round decisions and objectives to "digits" decimals if set
+    :param append: Keep the records already in the file
+    """
+    folder = os.path.dirname(file_name)
+    if folder:
+      mkdir(folder)
+    self.file_name = file_name
+    self.metrics_only = metrics_only
+    self.digits = digits
+    self._file = open(file_name, "a" if append else "w")
+
+  def encode(self, values):
+    values = np.asarray(values, dtype=float)
+    if self.digits is not None:
+      values = np.round(values, self.digits)
+    return values.tolist()
+
+  def write(self, record):
+    """
+    Write a record on its own line and flush it to disk
+    :param record: Dictionary
+    """
+    self._file.write(json.dumps(record, separators=(",", ":")))
+    self._file.write("\n")
+    self._file.flush()
+
+  def write_points(self, record, points):
+    """
+    Add the points to a record unless
+    only metrics are written and write it
+    :param record: Dictionary
+    :param points: List of points
+    """
+    if points and not self.metrics_only:
+      record["ids"] = [int(one.id) for one in points]
+      record["decisions"] = self.encode([one.decisions for one in points])
+      objectives = [one.objectives if one.objectives is not None else [] for one in points]
+      if all(len(objs) for objs in objectives):
+        record["objectives"] = self.encode(objectives)
+      else:
+        # Points not evaluated yet are written with empty objectives
+        record["objectives"] = [self.encode(objs) if len(objs) else [] for objs in objectives]
+    self.write(record)
+
+  def tell(self):
+    return self._file.tell()
+
+  def truncate(self, offset):
+    """
+    Drop the records after "offset", used when
+    a run resumes from an earlier checkpoint
+    :param offset: Position returned by tell
+    """
+    self._file.truncate(offset)
+    self._file.seek(0, os.SEEK_END)
+
+  def close(self):
+    if not self._file.closed:
+      self._file.close()
+
+
+def read_records(file_name):
+  """
+  Records of a line delimited result file. A
+  truncated last line left by a crash is skipped.
+  :param file_name: Path of the file
+  :return: Generator of dictionaries
+  """
+  with open(file_name) as f:
+    for line in f:
+      try:
+        record = json.loads(line)
+      except ValueError:
+        return
+      yield record
+
+
+META = "meta.json"
+
+def write_columns(folder, meta, arrays):
+  """
+  Write a columnar result
+  :param folder: Path of the result folder. Created if needed.
+  :param meta: Dictionary of scalar metrics and descriptions
+  :param arrays: Dictionary of name to array
+  """
+  mkdir(folder)
+  for name, values in arrays.items():
+    np.save(os.path.join(folder, name + ".npy"), values)
+  meta = dict(meta)
+  meta["arrays"] = sorted(arrays.keys())
+  # Written last so that a folder with a meta file is complete
+  with open(os.path.join(folder, META), "w") as f:
+    json.dump(meta, f, separators=(",", ":"))
+
+
+class ColumnarResult(object):
+  """
+  Reader of a columnar result. The metrics come from
+  the meta file alone, arrays are loaded on first use.
+  """
+  def __init__(self, folder, mmap=True):
+    """
+    :param folder: Path of the result folder
+    :param mmap: Memory map the arrays instead of reading them
+    """
+    self.folder = folder
+    self.mmap = mmap
+    self.meta = get_json(os.path.join(folder, META))
+    self._arrays = {}
+
+  def __getitem__(self, name):
+    """
+    :param name: Name of an array. See meta["arrays"]
+    :return: Array
+    """
+    if name not in self._arrays:
+      self._arrays[name] = np.load(os.path.join(self.folder, name + ".npy"),
+                                   mmap_mode="r" if self.mmap else None)
+    return self._arrays[name]
+
+  def __len__(self):
+    return len(self["numbers"])
+
+  def generation(self, index):
+    """
+    Arrays of a recorded generation
+    :param index: Index of the recorded generation. -1 for the latest
+    :return: ids, decisions, objectives
+    """
+    if index < 0:
+      index += len(self)
+    offsets = self["offsets"]
+    rows = self["members"][offsets[index]:offsets[index + 1]]
+    return self["ids"][rows], self["decisions"][rows], self["objectives"][rows]
+
+
+def load_metrics(folder):
+  """
+  Metrics of a columnar result without touching its arrays
+  :param folder: Path of the result folder
+  :return: Dictionary
+  """
+  return get_json(os.path.join(folder, META))
+
+
+def load_summary(file_name):
+  """
+  Summary of a result file. For line delimited
+  files this is the summary record, or the last
+  generation if the run did not finish. For
+  columnar results it is the meta file.
+  :param file_name: Path of a .json or .jsonl file or of a columnar folder
+  :return: Dictionary
+  """
+  if os.path.isdir(file_name):
+    return load_metrics(file_name)
+  if not file_name.endswith(".jsonl"):
+    return get_json(file_name)
+  last = {}
+  for record in read_records(file_name):
+    if record.get("type") == "summary":
+      return record
+    if record.get("type") == "generation":
+      last = record
+  return last
+
+
+INDEX = "index.jsonl"
+METRICS = ["convergence", "spread", "igd", "hyperVolume", "evals", "runtime"]
+REPEAT = re.compile(r"^rep_(\d+)\.(json|jsonl|columns)$")
+
+def index_row(problem, algorithm, repeat, file_name, summary):
+  """
+  Row of the index for a repeat
+  :param problem: Name of the problem folder
+  :param algorithm: Name of the algorithm
+  :param repeat: Experiment repeat number
+  :param file_name: Path of the result file
+  :param summary: Dictionary with the metrics
+  :return: Dictionary
+  """
+  row = {"problem" : problem, "algorithm" : algorithm, "repeat" : repeat, "file" : file_name}
+  for metric in METRICS:
+    row[metric] = summary.get(metric, None)
+  return row
+
+def append_index(expt_id, row):
+  """
+  Add a row to the index of an experiment. Rows are
+  single appended lines so that concurrent repeats do
+  not interleave. Later rows replace earlier ones.
+  :param expt_id: Experiment ID
+  :param row: Row from index_row
+  """
+  folder = "results/%s" % expt_id
+  mkdir(folder)
+  with open(os.path.join(folder, INDEX), "a") as f:
+    f.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+def read_index(expt_id):
+  """
+  Rows of the index of an experiment. Rebuilt
+  from the result files if it does not exist.
+  :param expt_id: Experiment ID
+  :return: List of rows, one per problem, algorithm and repeat
+  """
+  file_name = os.path.join("results/%s" % expt_id, INDEX)
+  if not os.path.exists(file_name):
+    return rebuild_index(expt_id)
+  rows = {}
+  for row in read_records(file_name):
+    rows[(row["problem"], row["algorithm"], row["repeat"])] = row
+  return [rows[key] for key in sorted(rows)]
+
+def _read_row(args):
+  problem, algorithm, repeat, file_name = args
+  return index_row(problem, algorithm, repeat, file_name, load_summary(file_name))
+
+def rebuild_index(expt_id, processes=None):
+  """
+  Regenerate the index of an experiment from its
+  result files, reading the files in parallel.
+  :param expt_id: Experiment ID
+  :param processes: Number of processes. Number of CPUs if None.
+  :return: List of rows
+  """
+  base_dir = "results/%s" % expt_id
+  jobs = []
+  for problem in sorted(get_subdirectories(base_dir)):
+    for algorithm in sorted(get_subdirectories(os.path.join(base_dir, problem))):
+      algo_dir = os.path.join(base_dir, problem, algorithm)
+      for rep in sorted(ls(algo_dir)):
+        match = REPEAT.match(rep)
+        if match:
+          jobs.append((problem, algorithm, int(match.group(1)), os.path.join(algo_dir, rep)))
+  if processes == 1 or len(jobs) < 2:
+    rows = [_read_row(job) for job in jobs]
+  else:
+    pool = Pool(processes)
+    try:
+      rows = pool.map(_read_row, jobs)
+    finally:
+      pool.close()
+      pool.join()
+  temp = os.path.join(base_dir, INDEX + ".tmp")
+  with open(temp, "w") as f:
+    for row in rows:
+      f.write(json.dumps(row, separators=(",", ":")) + "\n")
+  os.rename(temp, os.path.join(base_dir, INDEX))
+  return read_index(expt_id)
+
+
+if __name__ == "__main__":
+  if len(sys.argv) < 3 or sys.argv[1] != "rebuild":
+    print("Usage : python utils/results.py rebuild <expt_id> [processes]")
+    exit()
+  rows = rebuild_index(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+  print("Indexed %d repeats" % len(rows))
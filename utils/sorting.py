@@ -0,0 +1,512 @@
+"""
+Non-dominated sorting on objective matrices.
+All objectives are minimized. Use point_matrix
+to build the inputs from a list of points.
+"""
+from __future__ import print_function, division
+import sys, os
+sys.path.append(os.path.abspath("."))
+import numpy as np
+from bisect import bisect_right
+
+__author__ = 'panzer'
+
+# Largest number of (row, column, objective) cells
+# compared at once. Bounds the memory of a comparison
+# to a few tens of MB irrespective of population size.
+MAX_CELLS = 2**22
+
+def point_matrix(problem, points):
+  """
+  Build the inputs of the sorting methods from a list of
+  evaluated points. Maximized objectives are negated.
+  :param problem: Instance of the problem
+  :param points: List of evaluated points
+  :return: (N x m) objective matrix, Vector(N) of constraint
+  violations or None if the problem is unconstrained
+  """
+  objectives = np.array([one.objectives for one in points], dtype=float)
+  objectives *= problem.directional_weights()
+  if not problem.is_constrained():
+    return objectives, None
+  violations = []
+  for one in points:
+    status, offset = one.get_constraint_status(problem)
+    violations.append(0 if status else offset)
+  return objectives, np.array(violations, dtype=float)
+
+def dominates(one, two):
+  """
+  Pareto domination between two sets of points
+  :param one: (A x m) objective matrix
+  :param two: (B x m) objective matrix
+  :return: (A x B) boolean matrix. [i, j] is True
+  if one[i] dominates two[j]
+  """
+  one = one[:, None, :]
+  two = two[None, :, :]
+  return np.all(one <= two, axis=2) & np.any(one < two, axis=2)
+
+def constrained_dominates(one, two, one_violations=None, two_violations=None):
+  """
+  Constrained domination between two sets of points.
+  A feasible point dominates an infeasible one and an
+  infeasible point dominates another if its violation
+  is smaller. Feasible points use Pareto domination.
+  :param one: (A x m) objective matrix
+  :param two: (B x m) objective matrix
+  :param one_violations: Vector(A) of constraint violations or None
+  :param two_violations: Vector(B) of constraint violations or None
+  :return: (A x B) boolean matrix. [i, j] is True
+  if one[i] dominates two[j]
+  """
+  matrix = dominates(one, two)
+  if one_violations is None or two_violations is None:
+    return matrix
+  one_feasible = (one_violations <= 0)[:, None]
+  two_feasible = (two_violations <= 0)[None, :]
+  matrix &= one_feasible & two_feasible
+  matrix |= one_feasible & ~two_feasible
+  matrix |= ~one_feasible & ~two_feasible & (one_violations[:, None] < two_violations[None, :])
+  return matrix
+
+def domination_matrix(objectives, violations=None):
+  """
+  Constrained domination between every pair of points.
+  :param objectives: (N x m) objective matrix
+  :param violations: Vector(N) of constraint violations or None
+  :return: (N x N) boolean matrix. [i, j] is True if i dominates j
+  """
+  objectives = np.asarray(objectives, dtype=float)
+  if violations is None:
+    return np.vstack([dominates(objectives[start:end], objectives)
+                      for start, end in blocks(objectives, len(objectives))])
+  violations = np.asarray(violations, dtype=float)
+  return np.vstack([constrained_dominates(objectives[start:end], objectives,
+                                          violations[start:end], violations)
+                    for start, end in blocks(objectives, len(objectives))])
+
+def blocks(objectives, rows):
+  """
+  Split "rows" rows into blocks so that comparing a
+  block against every point stays within MAX_CELLS
+  :param objectives: (N x m) objective matrix
+  :param rows: Number of rows to split
+  :return: List of (start, end)
+  """
+  n, m = objectives.shape
+  size = max(1, MAX_CELLS // max(1, n*m))
+  return [(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+def deb_sort(objectives):
+  """
+  Fast non-dominated sort of Deb et al. on a matrix.
+  Domination counts are computed with broadcasting. If the
+  full (N x N) domination matrix fits within MAX_CELLS it
+  is kept, otherwise it is recomputed block by block for
+  each front so that memory does not grow with N^2.
+  :param objectives: (N x m) objective matrix
+  :return: List of fronts. Each front is an array of row indices.
+  """
+  n, m = objectives.shape
+  matrix = None
+  if n * n * m <= MAX_CELLS:
+    matrix = dominates(objectives, objectives)
+  def domination_counts(rows):
+    if matrix is not None:
+      return matrix[rows].sum(axis=0)
+    counts = np.zeros(n, dtype=int)
+    for start, end in blocks(objectives, len(rows)):
+      counts += dominates(objectives[rows[start:end]], objectives).sum(axis=0)
+    return counts
+  counts = domination_counts(np.arange(n))
+  fronts = []
+  front = np.flatnonzero(counts == 0)
+  while len(front):
+    fronts.append(front)
+    # Ranked points never reach zero again
+    counts[front] = -1
+    counts -= domination_counts(front)
+    front = np.flatnonzero(counts == 0)
+  return fronts
+
+def sweep_sort(objectives):
+  """
+  Non-dominated sort for 2 objectives in O(N log N).
+  Points are swept in lexicographic order. Since every
+  point seen before has a lower or equal first objective,
+  a point is dominated by a front only if the front holds
+  a point with a lower or equal second objective.
+  :param objectives: (N x 2) objective matrix
+  :return: List of fronts. Each front is an array of row indices.
+  """
+  order = np.lexsort((objectives[:, 1], objectives[:, 0])).tolist()
+  values = objectives.tolist()
+  lowest = []   # Lowest second objective of each front. Non decreasing.
+  fronts = []
+  previous = None
+  for i in order:
+    if previous is not None and values[i] == values[previous]:
+      # Duplicates share the front
+      fronts[rank].append(i)
+      continue
+    f2 = values[i][1]
+    rank = bisect_right(lowest, f2)
+    if rank == len(lowest):
+      lowest.append(f2)
+      fronts.append([i])
+    else:
+      lowest[rank] = f2
+      fronts[rank].append(i)
+    previous = i
+  return [np.array(front, dtype=int) for front in fronts]
+
+def jensen_sort(objectives):
+  """
+  Divide and conquer non-dominated sort of Jensen, generalized
+  by Fortin et al. to handle equal objective values. Runs in
+  O(N log^(m-1) N). Duplicate points share the same front.
+  .. [Fortin2013] Fortin, Grenier and Parizeau, "Generalizing the
+     improved run-time complexity algorithm for non-dominated sorting", 2013.
+  :param objectives: (N x m) objective matrix
+  :return: List of fronts. Each front is an array of row indices.
+  """
+  n, m = objectives.shape
+  if n == 0:
+    return []
+  unique, inverse = np.unique(objectives, axis=0, return_inverse=True)
+  inverse = inverse.ravel()
+  # The helpers maximize. Rows of "unique" are in increasing lexicographic
+  # order, hence their negations are in decreasing lexicographic order.
+  fits = [tuple(row) for row in (-unique).tolist()]
+  ranks = [0] * len(fits)
+  _nd_helper_a(fits, list(range(len(fits))), m - 1, ranks)
+  unique_ranks = np.array(ranks, dtype=int)[inverse]
+  return [np.flatnonzero(unique_ranks == rank) for rank in range(max(ranks) + 1)]
+
+def _is_dominated(one, two):
+  """
+  True if "two" dominates "one" (maximization)
+  """
+  not_equal = False
+  for o_i, t_i in zip(one, two):
+    if o_i > t_i:
+      return False
+    elif o_i < t_i:
+      not_equal = True
+  return not_equal
+
+def _median(fits, ids, obj):
+  values = sorted(fits[i][obj] for i in ids)
+  length = len(values)
+  if length % 2 == 1:
+    return values[(length - 1) // 2]
+  return (values[(length - 1) // 2] + values[length // 2]) / 2.0
+
+def _nd_helper_a(fits, ids, obj, ranks):
+  """
+  Rank the points "ids" on the objectives 0..obj
+  """
+  if len(ids) < 2:
+    return
+  elif len(ids) == 2:
+    one, two = ids
+    if _is_dominated(fits[two][:obj+1], fits[one][:obj+1]):
+      ranks[two] = max(ranks[two], ranks[one] + 1)
+  elif obj == 1:
+    _sweep_a(fits, ids, ranks)
+  elif len(set(fits[i][obj] for i in ids)) == 1:
+    # All equal on this objective, move on to the previous one
+    _nd_helper_a(fits, ids, obj - 1, ranks)
+  else:
+    best, worst = _split_a(fits, ids, obj)
+    _nd_helper_a(fits, best, obj, ranks)
+    _nd_helper_b(fits, best, worst, obj - 1, ranks)
+    _nd_helper_a(fits, worst, obj, ranks)
+
+def _split_a(fits, ids, obj):
+  """
+  Split around the median of "obj". Points equal to the
+  median go to the side that balances the two halves.
+  """
+  median = _median(fits, ids, obj)
+  best_a, worst_a, best_b, worst_b = [], [], [], []
+  for i in ids:
+    if fits[i][obj] > median:
+      best_a.append(i)
+      best_b.append(i)
+    elif fits[i][obj] < median:
+      worst_a.append(i)
+      worst_b.append(i)
+    else:
+      best_a.append(i)
+      worst_b.append(i)
+  if abs(len(best_a) - len(worst_a)) <= abs(len(best_b) - len(worst_b)):
+    return best_a, worst_a
+  return best_b, worst_b
+
+def _sweep_a(fits, ids, ranks):
+  """
+  Rank the points "ids" on the first two objectives
+  """
+  stairs = [-fits[ids[0]][1]]
+  fstairs = [ids[0]]
+  for i in ids[1:]:
+    index = bisect_right(stairs, -fits[i][1])
+    if 0 < index <= len(stairs):
+      stair = max(fstairs[:index], key=ranks.__getitem__)
+      ranks[i] = max(ranks[i], ranks[stair] + 1)
+    for j in range(index, len(fstairs)):
+      if ranks[fstairs[j]] == ranks[i]:
+        del stairs[j]
+        del fstairs[j]
+        break
+    stairs.insert(index, -fits[i][1])
+    fstairs.insert(index, i)
+
+def _nd_helper_b(fits, best, worst, obj, ranks):
+  """
+  Update the ranks of "worst" with respect to the already
+  ranked "best" on the objectives 0..obj
+  """
+  if not worst or not best:
+    return
+  elif len(best) == 1 or len(worst) == 1:
+    for hi in worst:
+      for li in best:
+        h, l = fits[hi][:obj+1], fits[li][:obj+1]
+        if _is_dominated(h, l) or h == l:
+          ranks[hi] = max(ranks[hi], ranks[li] + 1)
+  elif obj == 1:
+    _sweep_b(fits, best, worst, ranks)
+  elif min(fits[i][obj] for i in best) >= max(fits[i][obj] for i in worst):
+    # Every point of best is better on this objective
+    _nd_helper_b(fits, best, worst, obj - 1, ranks)
+  elif max(fits[i][obj] for i in best) >= min(fits[i][obj] for i in worst):
+    best1, best2, worst1, worst2 = _split_b(fits, best, worst, obj)
+    _nd_helper_b(fits, best1, worst1, obj, ranks)
+    _nd_helper_b(fits, best1, worst2, obj - 1, ranks)
+    _nd_helper_b(fits, best2, worst2, obj, ranks)
+
+def _split_b(fits, best, worst, obj):
+  """
+  Split both sets around the median of "obj" computed on the
+  larger set, balancing the four parts as much as possible.
+  """
+  median = _median(fits, best if len(best) > len(worst) else worst, obj)
+  def split(ids):
+    one_a, two_a, one_b, two_b = [], [], [], []
+    for i in ids:
+      if fits[i][obj] > median:
+        one_a.append(i)
+        one_b.append(i)
+      elif fits[i][obj] < median:
+        two_a.append(i)
+        two_b.append(i)
+      else:
+        one_a.append(i)
+        two_b.append(i)
+    return one_a, two_a, one_b, two_b
+  best1_a, best2_a, best1_b, best2_b = split(best)
+  worst1_a, worst2_a, worst1_b, worst2_b = split(worst)
+  balance_a = abs(len(best1_a) - len(best2_a) + len(worst1_a) - len(worst2_a))
+  balance_b = abs(len(best1_b) - len(best2_b) + len(worst1_b) - len(worst2_b))
+  if balance_a <= balance_b:
+    return best1_a, best2_a, worst1_a, worst2_a
+  return best1_b, best2_b, worst1_b, worst2_b
+
+def _sweep_b(fits, best, worst, ranks):
+  """
+  Update the ranks of "worst" with respect to "best"
+  on the first two objectives
+  """
+  stairs, fstairs = [], []
+  next_best = iter(best)
+  li = next(next_best, None)
+  for hi in worst:
+    while li is not None and fits[hi][:2] <= fits[li][:2]:
+      insert = True
+      for j, stair in enumerate(fstairs):
+        if ranks[stair] == ranks[li]:
+          if fits[stair][1] > fits[li][1]:
+            insert = False
+          else:
+            del stairs[j], fstairs[j]
+          break
+      if insert:
+        index = bisect_right(stairs, -fits[li][1])
+        stairs.insert(index, -fits[li][1])
+        fstairs.insert(index, li)
+      li = next(next_best, None)
+    index = bisect_right(stairs, -fits[hi][1])
+    if 0 < index <= len(stairs):
+      stair = max(fstairs[:index], key=ranks.__getitem__)
+      ranks[hi] = max(ranks[hi], ranks[stair] + 1)
+
+def ens_sort(objectives, search="sequential"):
+  """
+  Efficient non-dominated sort of Zhang et al. Points are
+  visited in lexicographic order so that a point can only
+  be dominated by points already assigned to a front. Each
+  point is placed in the first front that does not dominate
+  it, found by a sequential or a binary search over the fronts.
+  .. [Zhang2015] Zhang, Tian, Cheng and Jin, "An Efficient Approach to
+     Nondominated Sorting for Evolutionary Multiobjective Optimization", 2015.
+  :param objectives: (N x m) objective matrix
+  :param search: "sequential" or "binary"
+  :return: List of fronts. Each front is an array of row indices.
+  """
+  n, m = objectives.shape
+  if n == 0:
+    return []
+  # Rows of "unique" are in lexicographic order and distinct, so
+  # weak domination by an earlier row is Pareto domination.
+  unique, inverse = np.unique(objectives, axis=0, return_inverse=True)
+  inverse = inverse.ravel()
+  members = []  # Objectives of each front, grown by doubling
+  sizes = []
+  ranks = np.empty(len(unique), dtype=int)
+  def is_dominated(rank, point):
+    return np.any(np.all(members[rank][:sizes[rank]] <= point, axis=1))
+  for i, point in enumerate(unique):
+    if search == "binary":
+      low, high = 0, len(members)
+      while low < high:
+        mid = (low + high) // 2
+        if is_dominated(mid, point):
+          low = mid + 1
+        else:
+          high = mid
+      rank = low
+    else:
+      rank = 0
+      while rank < len(members) and is_dominated(rank, point):
+        rank += 1
+    if rank == len(members):
+      members.append(np.empty((4, m)))
+      sizes.append(0)
+    elif sizes[rank] == len(members[rank]):
+      members[rank] = np.vstack([members[rank], np.empty_like(members[rank])])
+    members[rank][sizes[rank]] = point
+    sizes[rank] += 1
+    ranks[i] = rank
+  ranks = ranks[inverse]
+  return [np.flatnonzero(ranks == rank) for rank in range(len(members))]
+
+def ens_ss_sort(objectives):
+  return ens_sort(objectives, "sequential")
+
+def ens_bs_sort(objectives):
+  return ens_sort(objectives, "binary")
+
+def auto_sorter(objectives):
+  """
+  Pick a sorting method from the shape of the objectives.
+  Sweep for 2 objectives and divide and conquer for 3.
+  With more objectives the log factors of divide and
+  conquer grow, so the vectorized sort is used while
+  the domination matrix fits within MAX_CELLS and the
+  efficient non-dominated sort beyond that.
+  :param objectives: (N x m) objective matrix
+  :return: Name of the sorting method
+  """
+  n, m = objectives.shape
+  if m == 2:
+    return "sweep"
+  if m == 3:
+    return "jensen"
+  if n * n * m <= MAX_CELLS:
+    return "deb"
+  return "ens_bs"
+
+def get_sorter(name):
+  if name == "deb":
+    return deb_sort
+  elif name == "sweep":
+    return sweep_sort
+  elif name == "jensen":
+    return jensen_sort
+  elif name == "ens_ss":
+    return ens_ss_sort
+  elif name == "ens_bs":
+    return ens_bs_sort
+  assert False, "Invalid sorter : %s"%name
+
+def non_dominated_sort(objectives, violations=None, method="auto"):
+  """
+  Sort points into non-dominated fronts. Feasible points are
+  sorted with the chosen method. Infeasible points come after
+  all the feasible ones and are ranked by their violation.
+  :param objectives: (N x m) objective matrix
+  :param violations: Vector(N) of constraint violations or None
+  :param method: Name of the sorting method or "auto"
+  :return: List of fronts. Each front is a list of row indices.
+  """
+  objectives = np.asarray(objectives, dtype=float)
+  if method == "auto":
+    method = auto_sorter(objectives)
+  sorter = get_sorter(method)
+  if violations is None:
+    return [front.tolist() for front in sorter(objectives)]
+  violations = np.asarray(violations, dtype=float)
+  feasible = np.flatnonzero(violations <= 0)
+  infeasible = np.flatnonzero(violations > 0)
+  fronts = []
+  if len(feasible):
+    fronts += [feasible[front].tolist() for front in sorter(objectives[feasible])]
+  if len(infeasible):
+    infeasible = infeasible[np.argsort(violations[infeasible], kind="mergesort")]
+    splits = np.flatnonzero(np.diff(violations[infeasible])) + 1
+    fronts += [front.tolist() for front in np.split(infeasible, splits)]
+  return fronts
+
+def sort_points(problem, points, method="auto"):
+  """
+  Non-dominated sort of a list of evaluated points
+  :param problem: Instance of the problem
+  :param points: List of evaluated points
+  :param method: Name of the sorting method or "auto"
+  :return: List of fronts. Each front is a list of points.
+  """
+  if not points:
+    return []
+  objectives, violations = point_matrix(problem, points)
+  fronts = non_dominated_sort(objectives, violations, method)
+  return [[points[i] for i in front] for front in fronts]
+
+def _benchmark(repeats=5):
+  """
+  Time the sorting methods on the populations NSGA3 sorts
+  every generation(parents + kids) for the reference point
+  divisions of each objective count.
+  """
+  import time
+  from problems.dtlz.dtlz2 import DTLZ2
+  from algorithms.nsga3.reference import DIVISIONS
+  def combinations(n, k):
+    count = 1
+    for i in range(k):
+      count = count * (n - i) // (i + 1)
+    return count
+  methods = ["deb", "jensen", "ens_ss", "ens_bs"]
+  print("%4s %6s" % ("m", "N") + "".join("%10s" % method for method in methods))
+  for m in [3, 5, 8, 10, 15]:
+    outer, inner = DIVISIONS[m]
+    refs = combinations(m + outer - 1, outer) + (combinations(m + inner - 1, inner) if inner else 0)
+    n = 2 * 4 * ((refs + 3) // 4)
+    problem = DTLZ2(m)
+    decisions = np.random.random((n, len(problem.decisions)))
+    objectives = problem.evaluate_batch(decisions)
+    # Spread the population over several fronts
+    objectives *= 1 + np.random.randint(0, 5, size=(n, 1))
+    times = []
+    for method in methods:
+      sorter = get_sorter(method)
+      start = time.time()
+      for _ in range(repeats):
+        sorter(objectives)
+      times.append((time.time() - start) / repeats)
+    print("%4d %6d" % (m, n) + "".join("%9.2fms" % (1000 * t) for t in times))
+
+if __name__ == "__main__":
+  _benchmark()
@@ -11,9 +11,155 @@ from measures.convergence import convergence
 from measures.diversity import diversity
 from measures.igd import igd
 from plot import *
+from configs import HISTORY
+from utils.results import ResultWriter, write_columns, index_row, append_index, read_index
 
 __author__ = 'panzer'
 
+class GenerationLog(O):
+  """
+  Columnar history of the generations of a run. Each
+  generation records only the points it introduces, as
+  one chunk of ids, decisions and objectives, plus the
+  rows of all of its members. Points are matched on
+  their id and decisions, so points carried over from
+  the previous generation are not stored again. Points
+  not evaluated yet are stored apart with NaN objectives
+  and read back with empty objectives.
+  """
+  def __init__(self, retention="all", n_objectives=0):
+    """
+    :param retention: "all", "final" or k to keep every
+    k-th generation. The latest generation is always kept.
+    :param n_objectives: Number of objectives
+    """
+    O.__init__(self)
+    assert retention in ("all", "final") or (isinstance(retention, int) and retention > 0), \
+      "Invalid retention : %s"%retention
+    self.retention = retention
+    self.n_objectives = n_objectives
+    self.updates = 0
+    self._rows = {}
+    self._size = 0
+    self._keys = []
+    self._ids = []
+    self._decisions = []
+    self._objectives = []
+    self._members = []
+    self._numbers = []
+    self._tentative = False
+    self._columns = None
+
+  def __len__(self):
+    return len(self._members)
+
+  def keeps(self, number):
+    """
+    :param number: Index of the generation. 0 is the initial population.
+    :return: True if the generation is retained after later ones are added
+    """
+    if self.retention == "all":
+      return True
+    elif self.retention == "final":
+      return False
+    return number % self.retention == 0
+
+  def add(self, population):
+    """
+    Record a generation
+    :param population: List of points
+    """
+    if self._tentative:
+      self._drop_last()
+    rows, keys, ids, decisions, objectives = [], [], [], [], []
+    for one in population:
+      evaluated = len(one.objectives) > 0
+      key = (one.id, np.asarray(one.decisions, dtype=float).tobytes(), evaluated)
+      row = self._rows.get(key)
+      if row is None:
+        row = self._size
+        self._rows[key] = row
+        self._size += 1
+        keys.append(key)
+        ids.append(one.id)
+        decisions.append(one.decisions)
+        objectives.append(one.objectives if evaluated else [np.nan] * self.n_objectives)
+      rows.append(row)
+    self._keys.append(keys)
+    self._ids.append(np.array(ids, dtype=int))
+    self._decisions.append(np.array(decisions, dtype=float))
+    self._objectives.append(np.array(objectives, dtype=float))
+    self._members.append(np.array(rows, dtype=int))
+    self._numbers.append(self.updates)
+    self._tentative = not self.keeps(self.updates)
+    self._columns = None
+    self.updates += 1
+
+  def _drop_last(self):
+    """
+    Forget the latest generation and the points it introduced
+    """
+    for key in self._keys.pop():
+      del self._rows[key]
+    self._decisions.pop()
+    self._size -= len(self._ids.pop())
+    self._objectives.pop()
+    self._members.pop()
+    self._numbers.pop()
+
+  def _get_columns(self):
+    if self._columns is None:
+      self._columns = tuple(np.concatenate([chunk for chunk in chunks if len(chunk)] or [np.empty(0)])
+                            for chunks in (self._ids, self._decisions, self._objectives))
+    return self._columns
+
+  def number(self, index):
+    """
+    :param index: Index of a kept generation
+    :return: Index of the generation in the run
+    """
+    return self._numbers[index]
+
+  def get(self, index):
+    """
+    Arrays of a kept generation
+    :param index: Index of a kept generation. -1 for the latest
+    :return: ids, decisions, objectives
+    """
+    ids, decisions, objectives = self._get_columns()
+    rows = self._members[index]
+    return ids[rows], decisions[rows], objectives[rows]
+
+  def to_arrays(self):
+    """
+    The log as flat arrays. The members of kept generation
+    i are members[offsets[i]:offsets[i+1]], rows of ids,
+    decisions and objectives.
+    :return: Dictionary of name to array
+    """
+    ids, decisions, objectives = self._get_columns()
+    sizes = [len(rows) for rows in self._members]
+    return {
+      "ids" : ids,
+      "decisions" : decisions,
+      "objectives" : objectives,
+      "members" : np.concatenate(self._members) if self._members else np.empty(0, dtype=int),
+      "offsets" : np.cumsum([0] + sizes),
+      "numbers" : np.array(self._numbers, dtype=int)
+    }
+
+  def points(self, index):
+    """
+    Records of a kept generation
+    :param index: Index of a kept generation. -1 for the latest
+    :return: List of O with id, decisions and objectives.
+    Objectives are empty for points not evaluated yet.
+    """
+    ids, decisions, objectives = self.get(index)
+    evaluated = ~np.isnan(objectives).all(axis=1) if objectives.ndim == 2 else np.ones(len(ids), dtype=bool)
+    return [O(id=i, decisions=d, objectives=o if e else [])
+            for i, d, o, e in zip(ids.tolist(), decisions.tolist(), objectives.tolist(), evaluated.tolist())]
+
 class Stat(O):
   def __init__(self, problem, optimizer):
     """
@@ -23,7 +169,7 @@ class Stat(O):
     :return:
     Stat object that contains
     - problem
-    - generations: population for each generation
+    - generations: GenerationLog of the populations
     - evals: total number of evaluations
     - runtime: total runtime of optimization
     - IGD: Inverse Generational Distance for each generation
@@ -50,15 +196,42 @@ class Stat(O):
     self._optimizer = optimizer
     self.solutions = None
     self.gen_evals = None
+    self._writer = None
+    self._stream = None
+
+  def get_retention(self):
+    """
+    Retention of the generation log. The
+    "history" setting of the optimizer if
+    present, HISTORY otherwise.
+    """
+    settings = getattr(self._optimizer, "settings", None)
+    retention = settings["history"] if settings else None
+    return HISTORY if retention is None else retention
 
   def update(self, population, evals = 0):
     if self.generations is None:
-      self.generations = []
-    clones = []
-    for one in population:
-      clones.append(one.clone())
-    self.generations.append(clones)
+      self.generations = GenerationLog(self.get_retention(), len(self.objectives))
+    self.generations.add(population)
     self.evals += evals
+    if self._writer:
+      # Points like the nodes of GALE may not be evaluated yet
+      objs = np.array([one.objectives for one in population
+                       if one.objectives is not None and len(one.objectives) > 0], dtype=float)
+      record = {
+        "type" : "generation",
+        "gen" : self.generations.updates - 1,
+        "evals" : sum(self.gen_evals or []),
+        "size" : len(population)
+      }
+      if len(objs):
+        # Flipped to minimization so that the ideal of a
+        # maximized objective is its largest value
+        weights = np.array(self._problem.directional_weights(), dtype=float)
+        objs *= weights
+        record["ideal"] = (objs.min(axis=0) * weights).tolist()
+        record["nadir"] = (objs.max(axis=0) * weights).tolist()
+      self._writer.write_points(record, population)
 
   def update_solutions(self):
     if self.solutions:
@@ -67,11 +240,134 @@ class Stat(O):
     if not self._optimizer.is_pareto:
       # Exception for methods like gale that does
       # not generate solutions on the pareto front.
-      for generation in self.generations:
-        self.solutions.extend(generation)
+      for index in range(len(self.generations)):
+        self.solutions.extend(self.generations.points(index))
       self.solutions = self.solutions[-self._optimizer.settings.pop_size:]
     else:
-      self.solutions = self.generations[-1]
+      self.solutions = self.generations.points(-1)
+
+  def get_result_file(self, repeat, expt_id=None, extension="json"):
+    """
+    Path of the result file of a repeat
+    :param repeat: Experiment repeat number
+    :param expt_id: Experiment ID. First command line argument if None
+    :param extension: Extension of the file
+    :return: Path of the file. Folders are created.
+    """
+    folder = "results/%s/%s/%s/"%(self.get_expt_id(expt_id), self.get_problem_name(), self._optimizer.name)
+    mkdir(folder)
+    return folder + "rep_%d.%s"%(repeat, extension)
+
+  @staticmethod
+  def get_expt_id(expt_id=None):
+    """
+    :param expt_id: Experiment ID. First command line argument if None
+    :return: Experiment ID
+    """
+    if expt_id is None:
+      if len(sys.argv) < 2:
+        print("Experiment ID not provided")
+        exit()
+      expt_id = sys.argv[1]
+    return expt_id
+
+  def get_problem_name(self):
+    return self._problem.name + "_d" + str(len(self.decisions)) + "_o" + str(len(self.objectives))
+
+  def add_to_index(self, repeat, expt_id, file_name, metrics):
+    """
+    Record the metrics of a finished repeat
+    in the index of the experiment
+    :param repeat: Experiment repeat number
+    :param expt_id: Experiment ID. First command line argument if None
+    :param file_name: Path of the result file
+    :param metrics: Dictionary from get_metrics
+    """
+    row = index_row(self.get_problem_name(), self._optimizer.name, repeat, file_name, metrics)
+    append_index(self.get_expt_id(expt_id), row)
+
+  def get_metrics(self):
+    """
+    Metrics of the solutions
+    :return: Dictionary
+    """
+    self.update_solutions()
+    metrics = {}
+    metrics["gen_evals"] = self.gen_evals
+    metrics["evals"] = sum(self.gen_evals)
+    objs = [one.objectives for one in self.solutions]
+    true_pf = self._problem.get_pareto_front()
+    if true_pf:
+      metrics["convergence"] = convergence(objs, true_pf)
+      metrics["spread"] = diversity(objs, true_pf)
+      metrics["igd"] = igd(objs, true_pf)
+    reference = HyperVolume.get_reference_point(self._problem, objs)
+    metrics["hyperVolume"] = HyperVolume(reference).compute(objs)
+    metrics["runtime"] = self.runtime
+    return metrics
+
+  def stream(self, repeat=1, expt_id=None, metrics_only=False, digits=None, resume=False):
+    """
+    Write every generation to a line delimited
+    result file as soon as it is recorded. Call
+    before running the optimizer and finish with
+    close_stream.
+    :param repeat: Experiment repeat number
+    :param expt_id: Experiment ID. First command line argument if None
+    :param metrics_only: Skip the points and write metrics only
+    :param digits: Round decisions and objectives to "digits" decimals if set
+    :param resume: Append to the file of a run resumed from a checkpoint
+    """
+    file_name = self.get_result_file(repeat, expt_id, "jsonl")
+    resume = resume and os.path.exists(file_name)
+    self._writer = ResultWriter(file_name, metrics_only, digits, append=resume)
+    self._stream = (repeat, expt_id)
+    if resume:
+      return
+    self._writer.write({
+      "type" : "header",
+      "problem" : self._problem.name,
+      "optimizer" : self._optimizer.name,
+      "decisions" : [dec.__dict__ for dec in self.decisions],
+      "objectives" : [obj.__dict__ for obj in self.objectives]
+    })
+
+  def close_stream(self):
+    """
+    Write the summary record with the
+    metrics and the solutions and close
+    the result file.
+    """
+    summary = {"type" : "summary"}
+    summary.update(self.get_metrics())
+    self._writer.write_points(summary, self.solutions)
+    self._writer.close()
+    repeat, expt_id = self._stream
+    self.add_to_index(repeat, expt_id, self._writer.file_name, summary)
+    self._writer = None
+    self._stream = None
+
+  def to_columns(self, repeat=1, expt_id=None):
+    """
+    Write the run in the columnar format. A
+    folder of .npy arrays with the generation
+    log and the solutions, and a meta file with
+    the metrics. See utils.results.ColumnarResult
+    :param repeat: Experiment repeat number
+    :param expt_id: Experiment ID. First command line argument if None
+    """
+    folder = self.get_result_file(repeat, expt_id, "columns")
+    meta = self.get_metrics()
+    meta["problem"] = self._problem.name
+    meta["optimizer"] = self._optimizer.name
+    meta["decisions"] = [dec.__dict__ for dec in self.decisions]
+    meta["objectives"] = [obj.__dict__ for obj in self.objectives]
+    arrays = self.generations.to_arrays()
+    arrays["solution_ids"] = np.array([one.id for one in self.solutions], dtype=int)
+    arrays["solution_decisions"] = np.array([one.decisions for one in self.solutions], dtype=float)
+    arrays["solution_objectives"] = np.array([one.objectives for one in self.solutions], dtype=float)
+    write_columns(folder, meta, arrays)
+    self.add_to_index(repeat, expt_id, folder, meta)
 
   def to_json(self, repeat=1):
     """
@@ -79,15 +375,12 @@ class Stat(O):
     :param repeat:
     :return:
     """
-    args = sys.argv
-    if len(args) < 2:
-      print("Experiment ID not provided")
-      exit()
+    file_name = self.get_result_file(repeat)
     json_dict = {}
     gens = []
-    for gen in self.generations:
+    for index in range(len(self.generations)):
       pts = []
-      for point in gen:
+      for point in self.generations.points(index):
         pt = dict()
         pt["id"] = point.id
         pt["decisions"] = point.decisions
@@ -97,7 +390,7 @@ class Stat(O):
     json_dict["generations"] = gens
     json_dict["decisions"] = [dec.__dict__ for dec in self.decisions]
     json_dict["objectives"] = [obj.__dict__ for obj in self.objectives]
-    self.update_solutions()
+    json_dict.update(self.get_metrics())
     solutions=[]
     for point in self.solutions:
       solutions.append({
@@ -106,71 +399,31 @@ class Stat(O):
         "objectives" : point.objectives
       })
     json_dict["solutions"] = solutions
-    json_dict["gen_evals"] = self.gen_evals
-    json_dict["evals"] = sum(self.gen_evals)
-    objs = [one.objectives for one in self.solutions]
-    true_pf = self._problem.get_pareto_front()
-    if true_pf:
-      json_dict["convergence"] = convergence(objs, true_pf)
-      json_dict["spread"] = diversity(objs, true_pf)
-      json_dict["igd"] = igd(objs, true_pf)
-    reference = HyperVolume.get_reference_point(self._problem, objs)
-    json_dict["hyperVolume"] = HyperVolume(reference).compute(objs)
-    json_dict["runtime"] = self.runtime
-
-    expt_id = sys.argv[1]
-    problem_name = self._problem.name + "_d" + str(len(self.decisions)) + "_o" + str(len(self.objectives))
-    folder = "results/%s/%s/%s/"%(expt_id, problem_name, self._optimizer.name)
-    mkdir(folder)
-    file_name = folder + "rep_%d.json"%repeat
     with open(file_name, "w") as outfile:
       json.dump(json_dict, outfile, indent=4)
+    self.add_to_index(repeat, None, file_name, json_dict)
 
   @staticmethod
   def plot_experiment(expt_id):
+    """
+    Bar plots of the metrics of every algorithm
+    for each problem of an experiment. Reads the
+    experiment index only.
+    :param expt_id: Experiment ID
+    """
     base_dir = "results/%s"%expt_id
-    problems = get_subdirectories(base_dir)
-    for problem in problems:
+    grouped = {}
+    for row in read_index(expt_id):
+      grouped.setdefault(row["problem"], {}).setdefault(row["algorithm"], []).append(row)
+    for problem in sorted(grouped):
       problem_dir = base_dir + "/%s"%problem
-      algos =  get_subdirectories(problem_dir)
       convs, divs, igds, hvs, evals, runtimes = {}, {}, {}, {}, {}, {}
-      for algo in algos:
-        algo_dir = problem_dir + "/%s"%algo
-        reps = ls(algo_dir)
-        conv_list, div_list, igd_list, hv_list, eval_list, runtime_list = [], [], [], [], [], []
-        for rep in reps:
-          rep_file = algo_dir + "/%s"%rep
-          json_data = get_json(rep_file)
-          conv_val = json_data.get("convergence", None)
-          if conv_val : conv_list.append(conv_val)
-          div_val = json_data.get("spread", None)
-          if div_val : div_list.append(div_val)
-          igd_val = json_data.get("igd", None)
-          if igd_val : igd_list.append(igd_val)
-          hv_val = json_data.get("hyperVolume", None)
-          if hv_val : hv_list.append(hv_val)
-          eval_val = json_data.get("evals", None)
-          if eval_val: eval_list.append(eval_val)
-          runtime_val = json_data.get("runtime", None)
-          if runtime_val: runtime_list.append(runtime_val)
-        if conv_list:
-          mean, iqr = mean_iqr(conv_list)
-          convs[algo] = (mean, iqr)
-        if div_list:
-          mean, iqr = mean_iqr(div_list)
-          divs[algo] = (mean, iqr)
-        if igd_list:
-          mean, iqr = mean_iqr(igd_list)
-          igds[algo] = (mean, iqr)
-        if hv_list:
-          mean, iqr = mean_iqr(hv_list)
-          hvs[algo] = (mean, iqr)
-        if eval_list:
-          mean, iqr = mean_iqr(eval_list)
-          evals[algo] = (mean, iqr)
-        if runtime_list:
-          mean, iqr = mean_iqr(eval_list)
-          runtimes[algo] = (mean, iqr)
+      for algo, rows in grouped[problem].items():
+        for metric, summary in [("convergence", convs), ("spread", divs), ("igd", igds),
+                                ("hyperVolume", hvs), ("evals", evals), ("runtime", runtimes)]:
+          values = [row[metric] for row in rows if row[metric]]
+          if values:
+            summary[algo] = mean_iqr(values)
       bar_plot(convs, "Convergence", problem, problem_dir)
       bar_plot(divs, "Diversity", problem, problem_dir)
       bar_plot(igds, "IGD", problem, problem_dir)
@@ -106,13 +106,14 @@ def binary_tournament_selection(problem, population, size, is_domination = True)
   """
   tourn = random.sample(population, size)
   best = tourn[0]
+  if is_domination and problem.is_constrained():
+    dominates = lambda one, two: nsga_domination(problem, one, two)
+  else:
+    # Without constraints nsga_domination is plain domination
+    dominates = problem.better
   for i in range(1, len(tourn)):
-    if is_domination:
-      if nsga_domination(problem, tourn[i], best) == 1:
-        best = tourn[i]
-    else:
-      if problem.better(tourn[i], best) == 1:
-        best = tourn[i]
+    if dominates(tourn[i], best) == 1:
+      best = tourn[i]
   return best
 
 def nsga_domination(problem, one, two):
@@ -134,8 +135,10 @@ def nsga_domination(problem, one, two):
       1 - one better than two
       2 - two better than one
     """
-    one_status, one_offset = problem.evaluate_constraints(one.decisions)
-    two_status, two_offset = problem.evaluate_constraints(two.decisions)
+    if not problem.is_constrained():
+      return problem.better(one, two)
+    one_status, one_offset = one.get_constraint_status(problem)
+    two_status, two_offset = two.get_constraint_status(problem)
     if one_status and two_status:
       # Return the better solution if both solutions satisfy the constraints
       return problem.better(one, two)